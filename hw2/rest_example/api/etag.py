@@ -0,0 +1,16 @@
+def make_etag(*parts: object) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def is_not_modified(if_none_match: str | None, etag: str) -> bool:
+    """Checks If-None-Match against `etag` with the weak comparison of RFC 9110."""
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
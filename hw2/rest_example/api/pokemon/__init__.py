@@ -1,9 +1,18 @@
-from .contracts import PatchPokemonRequest, PokemonRequest, PokemonResponse
-from .routes import router
+from .contracts import (
+    BatchItemResponse,
+    IdentifiedPokemonRequest,
+    PatchPokemonRequest,
+    PokemonRequest,
+    PokemonResponse,
+)
+from .routes import enable_fast_serialization, router
 
 __all__ = [
     "PokemonResponse",
     "PokemonRequest",
     "PatchPokemonRequest",
+    "IdentifiedPokemonRequest",
+    "BatchItemResponse",
+    "enable_fast_serialization",
     "router",
 ]
@@ -31,6 +31,10 @@ class PokemonRequest(BaseModel):
         return PokemonInfo(name=self.name, published=self.published)
 
 
+class IdentifiedPokemonRequest(PokemonRequest):
+    id: int
+
+
 class PatchPokemonRequest(BaseModel):
     name: str | None = None
     published: bool | None = None
@@ -39,3 +43,21 @@ class PatchPokemonRequest(BaseModel):
 
     def as_patch_pokemon_info(self) -> PatchPokemonInfo:
         return PatchPokemonInfo(name=self.name, published=self.published)
+
+
+class BatchItemResponse(BaseModel):
+    id: int
+    status: int
+    pokemon: PokemonResponse | None = None
+
+    @staticmethod
+    def from_entity(
+        id: int,
+        entity: PokemonEntity | None,
+        status: int,
+    ) -> BatchItemResponse:
+        return BatchItemResponse(
+            id=id,
+            status=status,
+            pokemon=PokemonResponse.from_entity(entity) if entity else None,
+        )
@@ -0,0 +1,40 @@
+import json
+from dataclasses import fields
+from typing import Iterable
+
+from hw2.rest_example.store.models import PokemonInfo
+
+from .contracts import PokemonResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, stdlib json is still faster than pydantic
+    orjson = None
+
+# keys written by encode_rows, must match PokemonResponse and PokemonInfo fields
+_ENCODED_FIELDS = ("id", "name", "published")
+
+
+def check_response_schema() -> None:
+    """Checks once that raw store rows encode exactly as PokemonResponse would."""
+    response_fields = tuple(PokemonResponse.model_fields)
+    row_fields = ("id", *(f.name for f in fields(PokemonInfo)))
+
+    if not response_fields == row_fields == _ENCODED_FIELDS:
+        raise RuntimeError(
+            "Fast serialization is out of sync with PokemonResponse: "
+            f"encoder writes {_ENCODED_FIELDS}, store rows have {row_fields}, "
+            f"response has {response_fields}"
+        )
+
+
+def encode_rows(rows: Iterable[tuple[int, PokemonInfo]]) -> bytes:
+    payload = [
+        {"id": id, "name": info.name, "published": info.published}
+        for id, info in rows
+    ]
+
+    if orjson is not None:
+        return orjson.dumps(payload)
+
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode()
@@ -1,26 +1,134 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi import APIRouter, Body, Header, HTTPException, Query, Response
 from pydantic import NonNegativeInt, PositiveInt
 
 from hw2.rest_example import store
+from hw2.rest_example.api.etag import is_not_modified, make_etag
 
 from .contracts import (
+    BatchItemResponse,
+    IdentifiedPokemonRequest,
     PatchPokemonRequest,
     PokemonRequest,
     PokemonResponse,
 )
+from .encoding import check_response_schema, encode_rows
 
 router = APIRouter(prefix="/pokemon")
 
+_fast_serialization = False
 
-@router.get("/")
+
+def enable_fast_serialization() -> None:
+    """Encodes list responses straight from store rows, skipping pydantic.
+
+    The response schema is checked here once instead of on every request.
+    """
+    global _fast_serialization
+    check_response_schema()
+    _fast_serialization = True
+
+
+@router.get(
+    "/",
+    response_model=list[PokemonResponse],
+    responses={
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "Collection did not change since the version in If-None-Match",
+        },
+    },
+)
 async def get_pokemon_list(
+    response: Response,
     offset: Annotated[NonNegativeInt, Query()] = 0,
     limit: Annotated[PositiveInt, Query()] = 10,
-) -> list[PokemonResponse]:
-    return [PokemonResponse.from_entity(e) for e in store.get_many(offset, limit)]
+    after_id: Annotated[int | None, Query()] = None,
+    name: Annotated[str | None, Query()] = None,
+    published: Annotated[bool | None, Query()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> list[PokemonResponse] | Response:
+    # checked before reading the page, so an unchanged collection costs nothing
+    etag = make_etag(store.collection_version())
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"etag": etag})
+
+    if _fast_serialization:
+        return Response(
+            encode_rows(store.get_rows(offset, limit, after_id, name, published)),
+            media_type="application/json",
+            headers={"etag": etag},
+        )
+
+    response.headers["etag"] = etag
+
+    return [
+        PokemonResponse.from_entity(e)
+        for e in store.get_many(offset, limit, after_id, name, published)
+    ]
+
+
+# batch routes go before the /{id} ones, otherwise "batch" is matched as an id
+@router.post(
+    "/batch",
+    status_code=HTTPStatus.CREATED,
+)
+async def post_pokemon_batch(infos: list[PokemonRequest]) -> list[BatchItemResponse]:
+    entities = store.add_many(info.as_pokemon_info() for info in infos)
+
+    return [
+        BatchItemResponse.from_entity(entity.id, entity, HTTPStatus.CREATED)
+        for entity in entities
+    ]
+
+
+@router.put(
+    "/batch",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Per pokemon status: 200 if updated or upserted, "
+            "304 if one was not found",
+        },
+    },
+)
+async def put_pokemon_batch(
+    infos: list[IdentifiedPokemonRequest],
+    upsert: Annotated[bool, Query()] = False,
+) -> list[BatchItemResponse]:
+    items = [(info.id, info.as_pokemon_info()) for info in infos]
+    entities = store.upsert_many(items) if upsert else store.update_many(items)
+
+    return [
+        BatchItemResponse.from_entity(
+            id,
+            entity,
+            HTTPStatus.OK if entity else HTTPStatus.NOT_MODIFIED,
+        )
+        for (id, _), entity in zip(items, entities)
+    ]
+
+
+@router.delete(
+    "/batch",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Per pokemon status: 200 if deleted, 404 if one was not found",
+        },
+    },
+)
+async def delete_pokemon_batch(
+    ids: Annotated[list[int], Body()],
+) -> list[BatchItemResponse]:
+    deleted = store.delete_many(ids)
+
+    return [
+        BatchItemResponse(
+            id=id,
+            status=HTTPStatus.OK if ok else HTTPStatus.NOT_FOUND,
+        )
+        for id, ok in zip(ids, deleted)
+    ]
 
 
 @router.get(
@@ -29,12 +137,19 @@ async def get_pokemon_list(
         HTTPStatus.OK: {
             "description": "Successfully returned requested pokemon",
         },
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "Pokemon did not change since the version in If-None-Match",
+        },
         HTTPStatus.NOT_FOUND: {
             "description": "Failed to return requested pokemon as one was not found",
         },
     },
 )
-async def get_pokemon_by_id(id: int) -> PokemonResponse:
+async def get_pokemon_by_id(
+    id: int,
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> PokemonResponse:
     entity = store.get_one(id)
 
     if not entity:
@@ -43,6 +158,12 @@ async def get_pokemon_by_id(id: int) -> PokemonResponse:
             f"Request resource /pokemon/{id} was not found",
         )
 
+    etag = make_etag(entity.id, entity.version)
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"etag": etag})
+
+    response.headers["etag"] = etag
+
     return PokemonResponse.from_entity(entity)
 
 
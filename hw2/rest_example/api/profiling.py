@@ -0,0 +1,139 @@
+import asyncio
+import sys
+import threading
+from collections import Counter
+from http import HTTPStatus
+from time import monotonic, sleep
+from types import FrameType
+from typing import Annotated
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# only asked for once per sample, so a short interval costs next to nothing
+_SAMPLING_SWITCH_INTERVAL = 0.00005
+
+
+class StackSampler:
+    """Statistical profiler: snapshots the stacks of all threads at an interval.
+
+    Nothing is hooked into the interpreter, so the overhead is one stack walk
+    per thread per sample, however many requests the app is serving.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self._interval = interval
+        self._stacks = Counter[str]()
+        # frame of ProfilingMiddleware.__call__ -> scope of the request it serves
+        self._requests = dict[FrameType, Scope]()
+
+    def track(self, frame: FrameType, scope: Scope) -> None:
+        self._requests[frame] = scope
+
+    def untrack(self, frame: FrameType) -> None:
+        self._requests.pop(frame, None)
+
+    def run(self, seconds: float) -> None:
+        me = threading.get_ident()
+        deadline = monotonic() + seconds
+
+        # the sampler needs the GIL to look at other threads; with the default
+        # 5ms switch interval a busy event loop would only hand it over at its
+        # next blocking call, so every sample would land on a socket write
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(switch_interval, _SAMPLING_SWITCH_INTERVAL))
+        try:
+            while monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id != me:
+                        self._sample(frame, names.get(thread_id, str(thread_id)))
+
+                sleep(self._interval)
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+    def _sample(self, frame: FrameType | None, thread_name: str) -> None:
+        label = f"<{thread_name}>"
+        stack = []
+
+        while frame is not None:
+            if (scope := self._requests.get(frame)) is not None:
+                # frames below the middleware belong to the request, the ones
+                # above it are the server and are the same for every request
+                label = _route_label(scope)
+                break
+
+            stack.append(_frame_name(frame))
+            frame = frame.f_back
+
+        stack.append(label)
+        self._stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Samples as collapsed stacks, the input format of flamegraph.pl and speedscope."""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+
+
+def _frame_name(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_qualname}"
+
+
+def _route_label(scope: Scope) -> str:
+    # the router stores the matched route in the scope the middleware holds;
+    # before routing, or when nothing matched, only the raw path is known
+    route = scope.get("route")
+    path = scope["path"] if route is None else route.path
+
+    return f"{scope['method']} {path}"
+
+
+_sampler: StackSampler | None = None
+
+
+class ProfilingMiddleware:
+    """Lets the running sampler attribute stacks to the route being served.
+
+    While no profile is taken, this costs one global lookup per request.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        sampler = _sampler
+        if sampler is None or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        frame = sys._getframe()
+        sampler.track(frame, scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.untrack(frame)
+
+
+# not protected in any way, apps mount it only when asked to
+router = APIRouter(prefix="/admin")
+
+
+@router.post("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: Annotated[float, Query(gt=0, le=60)] = 10,
+    interval: Annotated[float, Query(ge=0.001, le=1)] = 0.01,
+) -> PlainTextResponse:
+    """Samples the app for `seconds` and returns collapsed stacks per route."""
+    global _sampler
+
+    if _sampler is not None:
+        raise HTTPException(HTTPStatus.CONFLICT, "Profiling is already running")
+
+    sampler = _sampler = StackSampler(interval)
+    try:
+        await asyncio.to_thread(sampler.run, seconds)
+    finally:
+        _sampler = None
+
+    return PlainTextResponse(sampler.collapsed())
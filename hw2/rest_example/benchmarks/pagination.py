@@ -0,0 +1,60 @@
+import sys
+from timeit import timeit
+from typing import Iterable
+
+from hw2.rest_example.store import (
+    MemoryStore,
+    PokemonEntity,
+    PokemonInfo,
+    ShardedMemoryStore,
+    StoreBackend,
+)
+
+LIMIT = 10
+REPEAT = 20
+
+
+def linear_get_many(
+    store: MemoryStore,
+    offset: int = 0,
+    limit: int = 10,
+) -> Iterable[PokemonEntity]:
+    # the scan get_many used before the sorted index was introduced
+    curr = 0
+    for id, info in store._data.items():
+        if offset <= curr < offset + limit:
+            yield PokemonEntity(id, info)
+
+        curr += 1
+
+
+def ms(fn) -> float:
+    return timeit(fn, number=REPEAT) / REPEAT * 1000
+
+
+def main(records: int) -> None:
+    store = MemoryStore()
+    sharded: StoreBackend = ShardedMemoryStore(8)
+    for i in range(records):
+        info = PokemonInfo(name=f"pokemon-{i}", published=i % 2 == 0)
+        store.add(info)
+        sharded.upsert(i, info)
+
+    print(f"records={records} limit={LIMIT}")
+    print(
+        f"{'offset':>10} {'linear, ms':>12} {'indexed, ms':>12}"
+        f" {'keyset, ms':>12} {'sharded, ms':>12}"
+    )
+
+    for offset in (0, records // 100, records // 2, records - LIMIT):
+        print(
+            f"{offset:>10}"
+            f" {ms(lambda: list(linear_get_many(store, offset, LIMIT))):>12.3f}"
+            f" {ms(lambda: list(store.get_many(offset, LIMIT))):>12.3f}"
+            f" {ms(lambda: list(store.get_many(0, LIMIT, offset - 1))):>12.3f}"
+            f" {ms(lambda: list(sharded.get_many(offset, LIMIT))):>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
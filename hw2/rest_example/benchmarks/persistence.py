@@ -0,0 +1,73 @@
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from hw2.rest_example.store import DurableStore, PokemonInfo
+
+BATCH = 1000
+
+
+def write(directory: str, records: int, fsync_every: int, batched: bool) -> float:
+    store = DurableStore(directory, fsync_every=fsync_every, snapshot_every=sys.maxsize)
+    infos = [PokemonInfo(name=f"pokemon-{i}", published=i % 2 == 0) for i in range(records)]
+
+    started = perf_counter()
+    if batched:
+        for i in range(0, records, BATCH):
+            store.add_many(infos[i : i + BATCH])
+    else:
+        for info in infos:
+            store.add(info)
+    store.flush()
+    elapsed = perf_counter() - started
+
+    store.close()
+    return records / elapsed
+
+
+def startup(directory: str) -> float:
+    started = perf_counter()
+    DurableStore(directory).close()
+    return perf_counter() - started
+
+
+def main(records: int) -> None:
+    print(f"records={records}")
+
+    # fsync per record is bounded by disk latency, so it gets a smaller dataset
+    for fsync_every, count in ((1, min(records, 10_000)), (64, records), (1024, records)):
+        with TemporaryDirectory() as directory:
+            single = write(directory, count, fsync_every, batched=False)
+        with TemporaryDirectory() as directory:
+            batched = write(directory, count, fsync_every, batched=True)
+
+        print(
+            f"write fsync_every={fsync_every:<5} "
+            f"add: {single:>12,.0f} rec/s   add_many({BATCH}): {batched:>12,.0f} rec/s"
+        )
+
+    with TemporaryDirectory() as directory:
+        write(directory, records, 1024, batched=True)
+
+        # rewrite every row once, so the log holds two records per row
+        store = DurableStore(directory, fsync_every=1024, snapshot_every=sys.maxsize)
+        for i in range(0, records, BATCH):
+            store.upsert_many(
+                (id, PokemonInfo(name=f"renamed-{id}", published=True))
+                for id in range(i, min(i + BATCH, records))
+            )
+        store.close()
+
+        print(f"startup, replay of the whole log: {startup(directory):.2f} s")
+
+        store = DurableStore(directory)
+        started = perf_counter()
+        store.snapshot()
+        print(f"snapshot write: {perf_counter() - started:.2f} s")
+        store.close()
+
+        print(f"startup, snapshot only: {startup(directory):.2f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,53 @@
+import sys
+from timeit import timeit
+
+from pydantic import TypeAdapter
+
+from hw2.rest_example.api.pokemon import PokemonResponse
+from hw2.rest_example.api.pokemon.encoding import (
+    check_response_schema,
+    encode_rows,
+    orjson,
+)
+from hw2.rest_example.store import MemoryStore, PokemonInfo
+
+RECORDS = 100_000
+
+# FastAPI validates the returned models against response_model and then dumps them
+response_adapter = TypeAdapter(list[PokemonResponse])
+
+
+def pydantic_path(store: MemoryStore, offset: int, limit: int) -> bytes:
+    models = [PokemonResponse.from_entity(e) for e in store.get_many(offset, limit)]
+    return response_adapter.dump_json(response_adapter.validate_python(models))
+
+
+def fast_path(store: MemoryStore, offset: int, limit: int) -> bytes:
+    return encode_rows(store.get_rows(offset, limit))
+
+
+def main(repeat: int) -> None:
+    check_response_schema()
+
+    store = MemoryStore()
+    for i in range(RECORDS):
+        store.add(PokemonInfo(name=f"pokemon-{i}", published=i % 2 == 0))
+
+    print(f"encoder={'orjson' if orjson else 'json'} repeat={repeat}")
+    print(f"{'limit':>6} {'pydantic, us':>14} {'fast, us':>10} {'speedup':>8}")
+
+    for limit in (10, 100, 1000):
+        offset = RECORDS // 2
+        assert pydantic_path(store, offset, limit) == fast_path(store, offset, limit)
+
+        slow = timeit(lambda: pydantic_path(store, offset, limit), number=repeat)
+        fast = timeit(lambda: fast_path(store, offset, limit), number=repeat)
+
+        print(
+            f"{limit:>6} {slow / repeat * 1e6:>14.1f} "
+            f"{fast / repeat * 1e6:>10.1f} {slow / fast:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
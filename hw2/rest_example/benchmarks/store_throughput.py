@@ -0,0 +1,60 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
+from time import perf_counter
+
+from hw2.rest_example.store import (
+    MemoryStore,
+    PatchPokemonInfo,
+    PokemonInfo,
+    ShardedMemoryStore,
+    StoreBackend,
+)
+
+PRELOADED = 100_000
+
+
+def worker(store: StoreBackend, seed: int, ops: int) -> None:
+    rnd = Random(seed)
+
+    for i in range(ops):
+        roll = rnd.random()
+        id = rnd.randrange(PRELOADED)
+
+        if roll < 0.2:
+            store.add(PokemonInfo(name=f"pokemon-{seed}-{i}", published=False))
+        elif roll < 0.4:
+            store.patch(id, PatchPokemonInfo(published=True))
+        elif roll < 0.5:
+            store.upsert(id, PokemonInfo(name=f"pokemon-{id}", published=True))
+        elif roll < 0.55:
+            list(store.get_many(rnd.randrange(PRELOADED), 10))
+        else:
+            store.get_one(id)
+
+
+def run(store: StoreBackend, threads: int, ops: int) -> float:
+    for i in range(PRELOADED):
+        store.upsert(i, PokemonInfo(name=f"pokemon-{i}", published=False))
+
+    started = perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(worker, store, t, ops) for t in range(threads)]:
+            future.result()
+
+    return threads * ops / (perf_counter() - started)
+
+
+def main(ops: int) -> None:
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"ops per thread={ops}, gil enabled={gil}")
+    print(f"{'threads':>8} {'single lock, ops/s':>20} {'8 shards, ops/s':>20}")
+
+    for threads in (1, 2, 4, 8, 16):
+        single = run(MemoryStore(), threads, ops)
+        sharded = run(ShardedMemoryStore(8), threads, ops)
+        print(f"{threads:>8} {single:>20,.0f} {sharded:>20,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
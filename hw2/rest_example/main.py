@@ -1,7 +1,43 @@
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
-from hw2.rest_example.api.pokemon import router
+from hw2.rest_example import store
+from hw2.rest_example.api import profiling
+from hw2.rest_example.api.pokemon import enable_fast_serialization, router
+
+backend: store.StoreBackend = store.MemoryStore()
+
+# more than one shard only pays off with threaded workers or free-threaded CPython
+if (shards := int(os.getenv("POKEMON_STORE_SHARDS", "1"))) > 1:
+    backend = store.ShardedMemoryStore(shards)
+
+if path := os.getenv("POKEMON_STORE_PATH"):
+    backend = store.DurableStore(
+        path,
+        backend,
+        fsync_every=int(os.getenv("POKEMON_STORE_FSYNC_EVERY", "64")),
+    )
+
+store.use_backend(backend)
+
+if os.getenv("POKEMON_FAST_SERIALIZATION") == "1":
+    enable_fast_serialization()
 
-app = FastAPI(title="Pokemon REST API Example")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+
+    if isinstance(backend, store.DurableStore):
+        backend.close()
+
+
+app = FastAPI(title="Pokemon REST API Example", lifespan=lifespan)
 
 app.include_router(router)
+
+if os.getenv("POKEMON_PROFILING") == "1":
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(profiling.router)
@@ -1,15 +1,44 @@
+from .backend import StoreBackend
+from .durable import DurableStore
+from .memory import MemoryStore, ShardedMemoryStore
 from .models import PatchPokemonInfo, PokemonEntity, PokemonInfo
-from .queries import add, delete, get_many, get_one, patch, update, upsert
+from .queries import (
+    add,
+    add_many,
+    collection_version,
+    delete,
+    delete_many,
+    get_many,
+    get_one,
+    get_rows,
+    patch,
+    update,
+    update_many,
+    upsert,
+    upsert_many,
+    use_backend,
+)
 
 __all__ = [
     "PokemonEntity",
     "PokemonInfo",
     "PatchPokemonInfo",
+    "StoreBackend",
+    "DurableStore",
+    "MemoryStore",
+    "ShardedMemoryStore",
     "add",
+    "add_many",
+    "collection_version",
     "delete",
+    "delete_many",
     "get_many",
     "get_one",
+    "get_rows",
     "update",
+    "update_many",
     "upsert",
+    "upsert_many",
     "patch",
+    "use_backend",
 ]
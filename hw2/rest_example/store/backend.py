@@ -0,0 +1,57 @@
+from typing import Iterable, Protocol
+
+from hw2.rest_example.store.models import (
+    PatchPokemonInfo,
+    PokemonEntity,
+    PokemonInfo,
+)
+
+
+class StoreBackend(Protocol):
+    def reserve_ids(self, up_to: int) -> None: ...
+
+    def collection_version(self) -> int: ...
+
+    def add(self, info: PokemonInfo) -> PokemonEntity: ...
+
+    def add_many(self, infos: Iterable[PokemonInfo]) -> list[PokemonEntity]: ...
+
+    def delete(self, id: int) -> None: ...
+
+    def delete_many(self, ids: Iterable[int]) -> list[bool]: ...
+
+    def get_one(self, id: int) -> PokemonEntity | None: ...
+
+    def get_many(
+        self,
+        offset: int = 0,
+        limit: int = 10,
+        after_id: int | None = None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> Iterable[PokemonEntity]: ...
+
+    def get_rows(
+        self,
+        offset: int = 0,
+        limit: int = 10,
+        after_id: int | None = None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> list[tuple[int, PokemonInfo]]: ...
+
+    def update(self, id: int, info: PokemonInfo) -> PokemonEntity | None: ...
+
+    def update_many(
+        self,
+        items: Iterable[tuple[int, PokemonInfo]],
+    ) -> list[PokemonEntity | None]: ...
+
+    def upsert(self, id: int, info: PokemonInfo) -> PokemonEntity: ...
+
+    def upsert_many(
+        self,
+        items: Iterable[tuple[int, PokemonInfo]],
+    ) -> list[PokemonEntity]: ...
+
+    def patch(self, id: int, patch_info: PatchPokemonInfo) -> PokemonEntity | None: ...
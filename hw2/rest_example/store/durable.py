@@ -0,0 +1,451 @@
+import mmap
+import os
+import struct
+import sys
+import zlib
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import BinaryIO, Iterable, Iterator
+
+from hw2.rest_example.store.backend import StoreBackend
+from hw2.rest_example.store.memory import MemoryStore
+from hw2.rest_example.store.models import (
+    PatchPokemonInfo,
+    PokemonEntity,
+    PokemonInfo,
+)
+
+# every log record is a full row image (or a tombstone), so replaying a log
+# segment over a snapshot that already contains it is harmless
+_OP_ADD = 1
+_OP_PUT = 2
+_OP_DELETE = 3
+
+_LOG_CRC = struct.Struct("<I")
+_LOG_BODY = struct.Struct("<BqBI")  # op, id, published, name length
+
+_SNAPSHOT_MAGIC = b"PKMNSNP2"
+# magic, first live segment, max added id, row count; then fixed-size rows and
+# a single utf-8 blob of all names, so loading is one iter_unpack and one decode
+_SNAPSHOT_HEADER = struct.Struct("<8sQqQ")
+_SNAPSHOT_ROW = struct.Struct("<qBI")  # id, published, name length in characters
+
+_SNAPSHOT_NAME = "snapshot.bin"
+_SEGMENT_GLOB = "wal-*.log"
+
+_Row = tuple[int, str, bool]
+
+_MIN_ID = -(2**63)
+_MAX_ID = 2**63 - 1
+
+
+def _check_id(id: int) -> None:
+    if not _MIN_ID <= id <= _MAX_ID:
+        raise ValueError(f"id {id} does not fit into the log record")
+
+
+def _segment_path(directory: Path, seq: int) -> Path:
+    return directory / f"wal-{seq:08d}.log"
+
+
+def _segment_seq(path: Path) -> int:
+    return int(path.stem.removeprefix("wal-"))
+
+
+def _fsync_dir(directory: Path) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _read_segment(path: Path) -> Iterator[tuple[int, int, PokemonInfo | None]]:
+    with path.open("r+b") as file:
+        size = os.fstat(file.fileno()).st_size
+        if size == 0:
+            return
+
+        with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as buf:
+            pos = 0
+            while pos + _LOG_CRC.size + _LOG_BODY.size <= size:
+                (crc,) = _LOG_CRC.unpack_from(buf, pos)
+                body_start = pos + _LOG_CRC.size
+                op, id, published, name_len = _LOG_BODY.unpack_from(buf, body_start)
+                end = body_start + _LOG_BODY.size + name_len
+
+                if end > size or zlib.crc32(buf[body_start:end]) != crc:
+                    break
+
+                name = buf[body_start + _LOG_BODY.size : end].decode()
+                info = None if op == _OP_DELETE else PokemonInfo(name, bool(published))
+                yield op, id, info
+                pos = end
+
+        if pos < size:
+            # a torn record left by a crash in the middle of a write
+            file.truncate(pos)
+
+
+def _write_snapshot(
+    path: Path,
+    first_segment: int,
+    max_added_id: int,
+    rows: list[_Row],
+) -> None:
+    names = "".join(name for _, name, _ in rows).encode()
+    rows_start = _SNAPSHOT_HEADER.size
+    names_start = rows_start + _SNAPSHOT_ROW.size * len(rows)
+    size = names_start + len(names)
+
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("w+b") as file:
+        file.truncate(size)
+        with mmap.mmap(file.fileno(), size) as buf:
+            _SNAPSHOT_HEADER.pack_into(
+                buf, 0, _SNAPSHOT_MAGIC, first_segment, max_added_id, len(rows)
+            )
+            pos = rows_start
+            for id, name, published in rows:
+                _SNAPSHOT_ROW.pack_into(buf, pos, id, published, len(name))
+                pos += _SNAPSHOT_ROW.size
+            buf[names_start:size] = names
+            buf.flush()
+        os.fsync(file.fileno())
+
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+
+
+def _read_snapshot(path: Path) -> tuple[int, int, list[tuple[int, PokemonInfo]]]:
+    with path.open("rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as buf:
+        magic, first_segment, max_added_id, count = _SNAPSHOT_HEADER.unpack_from(buf)
+        if magic != _SNAPSHOT_MAGIC:
+            raise ValueError(f"{path} is not a pokemon store snapshot")
+
+        rows_start = _SNAPSHOT_HEADER.size
+        names_start = rows_start + _SNAPSHOT_ROW.size * count
+        names = buf[names_start:].decode()
+
+        rows = []
+        pos = 0
+        for id, published, name_len in _SNAPSHOT_ROW.iter_unpack(
+            buf[rows_start:names_start]
+        ):
+            rows.append((id, PokemonInfo(names[pos : pos + name_len], bool(published))))
+            pos += name_len
+
+    return first_segment, max_added_id, rows
+
+
+class DurableStore:
+    """Write-ahead log plus snapshots on top of an in-memory backend.
+
+    Every mutation is applied to `backend` and appended to the current log
+    segment under one lock, so the log order is the apply order. Every
+    operation is flushed to the OS before it is acknowledged, so a crash of
+    the process alone loses nothing. The log is fsynced once `fsync_every`
+    records are pending, and a background thread fsyncs whatever is pending
+    every `fsync_interval` seconds (group commit): with `fsync_every=1`
+    nothing acknowledged is ever lost, larger values risk up to
+    `fsync_every` records or `fsync_interval` seconds of acknowledged writes
+    on power loss or an OS crash, in exchange for throughput.
+
+    After `snapshot_every` logged records the log switches to a new segment
+    and a compacted snapshot of the rows is written through mmap in a
+    background thread, after which older segments are removed. On startup
+    the last snapshot is loaded and only the segments after it are replayed.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        backend: StoreBackend | None = None,
+        fsync_every: int = 64,
+        fsync_interval: float = 0.05,
+        snapshot_every: int = 1_000_000,
+    ) -> None:
+        if fsync_every < 1:
+            raise ValueError("fsync_every must be positive")
+        if fsync_interval <= 0:
+            raise ValueError("fsync_interval must be positive")
+
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._backend = backend if backend is not None else MemoryStore()
+        self._fsync_every = fsync_every
+        self._fsync_interval = fsync_interval
+        self._snapshot_every = snapshot_every
+
+        self._lock = Lock()
+        self._unsynced = 0
+        self._segment_records = 0
+        self._max_added_id = -1
+        self._compaction: Thread | None = None
+
+        self._segment = self._recover()
+        self._log: BinaryIO = _segment_path(self._dir, self._segment).open("ab")
+
+        self._closed = Event()
+        self._syncer = Thread(
+            target=self._sync_periodically,
+            name="pokemon-store-fsync",
+            daemon=True,
+        )
+        self._syncer.start()
+
+    def _recover(self) -> int:
+        first_segment = 0
+        snapshot = self._dir / _SNAPSHOT_NAME
+        if snapshot.exists():
+            first_segment, self._max_added_id, rows = _read_snapshot(snapshot)
+            self._backend.upsert_many(rows)
+
+        segments = sorted(self._dir.glob(_SEGMENT_GLOB), key=_segment_seq)
+        last_segment = first_segment
+        for path in segments:
+            seq = _segment_seq(path)
+            if seq < first_segment:
+                path.unlink()  # left over by a compaction interrupted by a crash
+                continue
+
+            last_segment = seq
+            for op, id, info in _read_segment(path):
+                if op == _OP_DELETE:
+                    self._backend.delete(id)
+                else:
+                    self._backend.upsert(id, info)  # type: ignore[arg-type]
+                    if op == _OP_ADD:
+                        self._max_added_id = max(self._max_added_id, id)
+
+        # deleted ids must not be handed out again after a restart
+        self._backend.reserve_ids(self._max_added_id)
+
+        return last_segment
+
+    def _append(self, op: int, id: int, info: PokemonInfo | None = None) -> None:
+        name = info.name.encode() if info is not None else b""
+        published = info.published if info is not None else False
+
+        body = _LOG_BODY.pack(op, id, published, len(name)) + name
+        self._log.write(_LOG_CRC.pack(zlib.crc32(body)) + body)
+
+        self._unsynced += 1
+        self._segment_records += 1
+
+    def _commit(self) -> None:
+        # called once per operation (or batch) with the lock held; the flush
+        # moves the records from the userspace buffer to the OS, which keeps
+        # them even if the process dies right after acknowledging
+        if self._unsynced >= self._fsync_every:
+            self._sync()
+        else:
+            self._log.flush()
+
+        if self._segment_records >= self._snapshot_every and self._compaction is None:
+            self._start_compaction()
+
+    def _sync(self) -> None:
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._unsynced = 0
+
+    def _sync_periodically(self) -> None:
+        # an idle store would otherwise never sync its last records
+        while not self._closed.wait(self._fsync_interval):
+            with self._lock:
+                if self._unsynced:
+                    self._sync()
+
+    def _start_compaction(self) -> None:
+        # rows are copied while the lock is held, because patch mutates infos in place
+        rows = [
+            (id, info.name, info.published)
+            for id, info in self._backend.get_rows(0, sys.maxsize)
+        ]
+
+        self._sync()
+        self._log.close()
+        self._segment += 1
+        self._segment_records = 0
+        self._log = _segment_path(self._dir, self._segment).open("ab")
+        _fsync_dir(self._dir)
+
+        self._compaction = Thread(
+            target=self._compact,
+            args=(self._segment, self._max_added_id, rows),
+            name="pokemon-store-compaction",
+            daemon=True,
+        )
+        self._compaction.start()
+
+    def _compact(self, first_segment: int, max_added_id: int, rows: list[_Row]) -> None:
+        try:
+            _write_snapshot(
+                self._dir / _SNAPSHOT_NAME, first_segment, max_added_id, rows
+            )
+
+            for path in self._dir.glob(_SEGMENT_GLOB):
+                if _segment_seq(path) < first_segment:
+                    path.unlink()
+        finally:
+            with self._lock:
+                self._compaction = None
+
+    def snapshot(self) -> None:
+        """Writes a snapshot now and waits for it to complete."""
+        with self._lock:
+            if self._compaction is None:
+                self._start_compaction()
+            compaction = self._compaction
+
+        if compaction is not None:
+            compaction.join()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        self._closed.set()
+        self._syncer.join()
+
+        with self._lock:
+            compaction = self._compaction
+
+        if compaction is not None:
+            compaction.join()
+
+        with self._lock:
+            self._sync()
+            self._log.close()
+
+    def reserve_ids(self, up_to: int) -> None:
+        with self._lock:
+            self._max_added_id = max(self._max_added_id, up_to)
+            self._backend.reserve_ids(up_to)
+
+    def collection_version(self) -> int:
+        return self._backend.collection_version()
+
+    def add(self, info: PokemonInfo) -> PokemonEntity:
+        with self._lock:
+            entity = self._backend.add(info)
+            self._max_added_id = max(self._max_added_id, entity.id)
+            self._append(_OP_ADD, entity.id, info)
+            self._commit()
+
+        return entity
+
+    def add_many(self, infos: Iterable[PokemonInfo]) -> list[PokemonEntity]:
+        with self._lock:
+            entities = self._backend.add_many(infos)
+            for entity in entities:
+                self._max_added_id = max(self._max_added_id, entity.id)
+                self._append(_OP_ADD, entity.id, entity.info)
+            self._commit()
+
+        return entities
+
+    def delete(self, id: int) -> None:
+        with self._lock:
+            if self._backend.get_one(id) is None:
+                return
+
+            self._backend.delete(id)
+            self._append(_OP_DELETE, id)
+            self._commit()
+
+    def delete_many(self, ids: Iterable[int]) -> list[bool]:
+        ids = list(ids)
+        with self._lock:
+            deleted = self._backend.delete_many(ids)
+            for id, ok in zip(ids, deleted):
+                if ok:
+                    self._append(_OP_DELETE, id)
+            self._commit()
+
+        return deleted
+
+    def get_one(self, id: int) -> PokemonEntity | None:
+        return self._backend.get_one(id)
+
+    def get_many(
+        self,
+        offset: int = 0,
+        limit: int = 10,
+        after_id: int | None = None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> Iterable[PokemonEntity]:
+        return self._backend.get_many(offset, limit, after_id, name, published)
+
+    def get_rows(
+        self,
+        offset: int = 0,
+        limit: int = 10,
+        after_id: int | None = None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> list[tuple[int, PokemonInfo]]:
+        return self._backend.get_rows(offset, limit, after_id, name, published)
+
+    def update(self, id: int, info: PokemonInfo) -> PokemonEntity | None:
+        with self._lock:
+            entity = self._backend.update(id, info)
+            if entity is not None:
+                self._append(_OP_PUT, id, info)
+                self._commit()
+
+        return entity
+
+    def update_many(
+        self,
+        items: Iterable[tuple[int, PokemonInfo]],
+    ) -> list[PokemonEntity | None]:
+        with self._lock:
+            entities = self._backend.update_many(items)
+            for entity in entities:
+                if entity is not None:
+                    self._append(_OP_PUT, entity.id, entity.info)
+            self._commit()
+
+        return entities
+
+    def upsert(self, id: int, info: PokemonInfo) -> PokemonEntity:
+        _check_id(id)
+
+        with self._lock:
+            entity = self._backend.upsert(id, info)
+            self._append(_OP_PUT, id, info)
+            self._commit()
+
+        return entity
+
+    def upsert_many(
+        self,
+        items: Iterable[tuple[int, PokemonInfo]],
+    ) -> list[PokemonEntity]:
+        items = list(items)
+        for id, _ in items:
+            _check_id(id)
+
+        with self._lock:
+            entities = self._backend.upsert_many(items)
+            for entity in entities:
+                self._append(_OP_PUT, entity.id, entity.info)
+            self._commit()
+
+        return entities
+
+    def patch(self, id: int, patch_info: PatchPokemonInfo) -> PokemonEntity | None:
+        with self._lock:
+            entity = self._backend.patch(id, patch_info)
+            if entity is not None:
+                # the patched row is logged as a whole, so replay never merges
+                self._append(_OP_PUT, id, entity.info)
+                self._commit()
+
+        return entity
@@ -0,0 +1,450 @@
+from bisect import bisect_left, insort
+from heapq import merge
+from itertools import count, islice
+from threading import Lock, local
+from time import time_ns
+from typing import Callable, Iterable, TypeVar
+
+from hw2.rest_example.store.models import (
+    PatchPokemonInfo,
+    PokemonEntity,
+    PokemonInfo,
+)
+from hw2.rest_example.store.sorted_ids import SortedIds
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+
+class MemoryStore:
+    """Keeps pokemons in a dict guarded by a single lock.
+
+    Ids of `_data` are kept sorted in `_ids`, so pages are sliced instead of
+    scanning the dict. Secondary indexes on `name` and `published` hold sorted
+    ids as well, so filtered pages are sliced the same way.
+
+    Every mutation takes the next value of a clock seeded with the current
+    time: it becomes the version of the changed row and of the whole store.
+    Versions never repeat, even across restarts or a delete and re-create of
+    the same id, so they are safe to hand out as ETags.
+    """
+
+    def __init__(self, id_start: int = 0, id_step: int = 1) -> None:
+        self._data = dict[int, PokemonInfo]()
+        self._ids = SortedIds()
+        self._by_name = dict[str, list[int]]()
+        self._by_published = {True: SortedIds(), False: SortedIds()}
+        self._next_id = id_start
+        self._id_step = id_step
+        self._clock = count(time_ns())
+        self._version = next(self._clock)
+        self._versions = dict[int, int]()
+        self._lock = Lock()
+
+    def _touch(self, id: int) -> int:
+        self._version = self._versions[id] = next(self._clock)
+        return self._version
+
+    def _index(self, id: int, info: PokemonInfo) -> None:
+        # names are selective, so a plain sorted list per name is enough
+        insort(self._by_name.setdefault(info.name, []), id)
+        self._by_published[info.published].add(id)
+
+    def _unindex(self, id: int, info: PokemonInfo) -> None:
+        name_ids = self._by_name[info.name]
+        del name_ids[bisect_left(name_ids, id)]
+        if not name_ids:
+            del self._by_name[info.name]
+
+        self._by_published[info.published].remove(id)
+
+    def _candidates(self, name: str | None, published: bool | None) -> SortedIds:
+        if name is None:
+            return self._ids if published is None else self._by_published[published]
+
+        name_ids = self._by_name.get(name, [])
+        if published is None:
+            return SortedIds(name_ids)
+
+        # the published filter is applied on top of the (small) name bucket
+        return SortedIds(id for id in name_ids if self._data[id].published == published)
+
+    def _page(
+        self,
+        offset: int,
+        limit: int,
+        after_id: int | None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> list[tuple[int, PokemonInfo]]:
+        ids = self._candidates(name, published)
+
+        start = offset
+        if after_id is not None:
+            start += ids.rank(after_id)
+
+        return [(id, self._data[id]) for id in ids.slice(start, limit)]
+
+    def _insert(self, info: PokemonInfo) -> int:
+        _id = self._next_id
+        while _id in self._data:  # skip ids already taken by upsert
+            _id += self._id_step
+
+        self._next_id = _id + self._id_step
+
+        self._data[_id] = info
+        self._ids.add(_id)
+        self._index(_id, info)
+        self._touch(_id)
+
+        return _id
+
+    def _remove(self, id: int) -> bool:
+        info = self._data.pop(id, None)
+        if info is None:
+            return False
+
+        self._ids.remove(id)
+        self._unindex(id, info)
+        del self._versions[id]
+        self._version = next(self._clock)
+
+        return True
+
+    def _replace(self, id: int, info: PokemonInfo) -> bool:
+        old = self._data.get(id)
+        if old is None:
+            return False
+
+        self._unindex(id, old)
+        self._data[id] = info
+        self._index(id, info)
+        self._touch(id)
+
+        return True
+
+    def _put(self, id: int, info: PokemonInfo) -> None:
+        old = self._data.get(id)
+        if old is None:
+            self._ids.add(id)
+        else:
+            self._unindex(id, old)
+
+        self._data[id] = info
+        self._index(id, info)
+        self._touch(id)
+
+    def reserve_ids(self, up_to: int) -> None:
+        """Makes `add` hand out only ids greater than `up_to`."""
+        with self._lock:
+            if self._next_id <= up_to:
+                # keep the next id in the same residue class modulo the step
+                self._next_id += (up_to - self._next_id) // self._id_step * self._id_step
+                self._next_id += self._id_step
+
+    def collection_version(self) -> int:
+        return self._version
+
+    def add(self, info: PokemonInfo) -> PokemonEntity:
+        with self._lock:
+            _id = self._insert(info)
+            return PokemonEntity(_id, info, self._versions[_id])
+
+    def add_many(self, infos: Iterable[PokemonInfo]) -> list[PokemonEntity]:
+        with self._lock:
+            entities = []
+            for info in infos:
+                _id = self._insert(info)
+                entities.append(PokemonEntity(_id, info, self._versions[_id]))
+
+            return entities
+
+    def delete(self, id: int) -> None:
+        with self._lock:
+            self._remove(id)
+
+    def delete_many(self, ids: Iterable[int]) -> list[bool]:
+        with self._lock:
+            return [self._remove(id) for id in ids]
+
+    def get_one(self, id: int) -> PokemonEntity | None:
+        # version is read before the row without the lock: a concurrent write
+        # may give a newer row with an older version, which only costs a cache
+        # miss, never a stale 304
+        version = self._versions.get(id)
+        info = self._data.get(id)
+        if info is None or version is None:
+            return None
+
+        return PokemonEntity(id=id, info=info, version=version)
+
+    def get_many(
+        self,
+        offset: int = 0,
+        limit: int = 10,
+        after_id: int | None = None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> Iterable[PokemonEntity]:
+        for id, info in self.get_rows(offset, limit, after_id, name, published):
+            yield PokemonEntity(id, info)
+
+    def get_rows(
+        self,
+        offset: int = 0,
+        limit: int = 10,
+        after_id: int | None = None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> list[tuple[int, PokemonInfo]]:
+        with self._lock:
+            return self._page(offset, limit, after_id, name, published)
+
+    def update(self, id: int, info: PokemonInfo) -> PokemonEntity | None:
+        with self._lock:
+            if not self._replace(id, info):
+                return None
+
+            return PokemonEntity(id=id, info=info, version=self._versions[id])
+
+    def update_many(
+        self,
+        items: Iterable[tuple[int, PokemonInfo]],
+    ) -> list[PokemonEntity | None]:
+        with self._lock:
+            return [
+                PokemonEntity(id, info, self._versions[id])
+                if self._replace(id, info)
+                else None
+                for id, info in items
+            ]
+
+    def upsert(self, id: int, info: PokemonInfo) -> PokemonEntity:
+        with self._lock:
+            self._put(id, info)
+            return PokemonEntity(id=id, info=info, version=self._versions[id])
+
+    def upsert_many(
+        self,
+        items: Iterable[tuple[int, PokemonInfo]],
+    ) -> list[PokemonEntity]:
+        result = []
+        with self._lock:
+            for id, info in items:
+                self._put(id, info)
+                result.append(PokemonEntity(id, info, self._versions[id]))
+
+        return result
+
+    def patch(self, id: int, patch_info: PatchPokemonInfo) -> PokemonEntity | None:
+        with self._lock:
+            info = self._data.get(id)
+            if info is None:
+                return None
+
+            self._unindex(id, info)
+
+            if patch_info.name is not None:
+                info.name = patch_info.name
+
+            if patch_info.published is not None:
+                info.published = patch_info.published
+
+            self._index(id, info)
+
+            return PokemonEntity(id=id, info=info, version=self._touch(id))
+
+
+class ShardedMemoryStore:
+    """Splits pokemons by `id % shards` between independent `MemoryStore`s.
+
+    Every shard has its own lock and generates ids only from its own residue
+    class, so writes to different shards never contend. Each thread sticks
+    to one shard for `add`, assigned round-robin on first use.
+    """
+
+    def __init__(self, shards: int = 8) -> None:
+        if shards < 1:
+            raise ValueError("shards must be positive")
+
+        self._shards = [MemoryStore(id_start=i, id_step=shards) for i in range(shards)]
+        self._next_shard = count()
+        self._local = local()
+
+    def _shard_for(self, id: int) -> MemoryStore:
+        return self._shards[id % len(self._shards)]
+
+    def _own_shard(self) -> MemoryStore:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._shards[next(self._next_shard) % len(self._shards)]
+            self._local.shard = shard
+
+        return shard
+
+    def _page(
+        self,
+        offset: int,
+        limit: int,
+        after_id: int | None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> list[tuple[int, PokemonInfo]]:
+        # a shard is locked only for the one lookup made on it, never all of
+        # them at once, so a page read stalls writers of one shard at a time
+        # for a few bisects; the page is not a snapshot of the whole store,
+        # which offset paging under concurrent writes never was anyway
+        shards = []
+        for shard in self._shards:
+            with shard._lock:
+                shards.append((shard, shard._candidates(name, published)))
+
+        def each(read: Callable[[SortedIds], _T]) -> list[_T]:
+            result = []
+            for shard, ids in shards:
+                with shard._lock:
+                    result.append(read(ids))
+            return result
+
+        rank = offset
+        if after_id is not None:
+            rank += sum(each(lambda ids: ids.rank(after_id)))
+
+        # the row with `rank` smaller ids lies between the smallest and the
+        # largest id found at position rank // shards of every shard (each
+        # shard alone has too few ids below the former, all together enough
+        # below the latter); with ids spread by `id % shards` that range is
+        # about `shards` wide, so the binary search over id values below
+        # takes a few steps instead of log2 of the whole id range
+        pos = rank // len(shards)
+        bounds = [
+            bound
+            for bound in each(
+                lambda ids: (len(ids), ids.first(), ids.last(), ids.slice(pos, 1))
+                if ids
+                else None
+            )
+            if bound is not None
+        ]
+        if rank >= sum(size for size, *_ in bounds):
+            return []
+
+        pivots = [pivot[0] for *_, pivot in bounds if pivot]
+        lo = min(pivots) if pivots else min(first for _, first, _, _ in bounds)
+        hi = (
+            max(pivots)
+            if len(pivots) == len(shards)
+            else max(last for _, _, last, _ in bounds)
+        )
+
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if sum(each(lambda ids: ids.rank(mid))) > rank:
+                hi = mid
+            else:
+                lo = mid + 1
+
+        heads = []
+        for shard, ids in shards:
+            with shard._lock:
+                # name filters search a copy of the ids taken above, rows
+                # deleted since then are skipped
+                rows = ((id, shard._data.get(id)) for id in ids.slice(ids.rank_left(lo), limit))
+                heads.append([(id, info) for id, info in rows if info is not None])
+
+        return list(islice(merge(*heads, key=lambda row: row[0]), limit))
+
+    def _scatter(
+        self,
+        keyed: list[tuple[int, _T]],
+        apply: Callable[[MemoryStore, list[_T]], list[_R]],
+    ) -> list[_R]:
+        # groups a batch by shard, so every shard lock is taken once per batch
+        groups = dict[int, list[int]]()
+        for pos, (id, _) in enumerate(keyed):
+            groups.setdefault(id % len(self._shards), []).append(pos)
+
+        result: list[_R] = [None] * len(keyed)  # type: ignore[list-item]
+        for shard_no, positions in groups.items():
+            shard_result = apply(
+                self._shards[shard_no],
+                [keyed[pos][1] for pos in positions],
+            )
+            for pos, value in zip(positions, shard_result):
+                result[pos] = value
+
+        return result
+
+    def reserve_ids(self, up_to: int) -> None:
+        for shard in self._shards:
+            shard.reserve_ids(up_to)
+
+    def collection_version(self) -> int:
+        # shard versions only grow, so their sum changes on every mutation
+        return sum(shard.collection_version() for shard in self._shards)
+
+    def add(self, info: PokemonInfo) -> PokemonEntity:
+        return self._own_shard().add(info)
+
+    def add_many(self, infos: Iterable[PokemonInfo]) -> list[PokemonEntity]:
+        return self._own_shard().add_many(infos)
+
+    def delete(self, id: int) -> None:
+        self._shard_for(id).delete(id)
+
+    def delete_many(self, ids: Iterable[int]) -> list[bool]:
+        return self._scatter(
+            [(id, id) for id in ids],
+            lambda shard, batch: shard.delete_many(batch),
+        )
+
+    def get_one(self, id: int) -> PokemonEntity | None:
+        return self._shard_for(id).get_one(id)
+
+    def get_many(
+        self,
+        offset: int = 0,
+        limit: int = 10,
+        after_id: int | None = None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> Iterable[PokemonEntity]:
+        for id, info in self.get_rows(offset, limit, after_id, name, published):
+            yield PokemonEntity(id, info)
+
+    def get_rows(
+        self,
+        offset: int = 0,
+        limit: int = 10,
+        after_id: int | None = None,
+        name: str | None = None,
+        published: bool | None = None,
+    ) -> list[tuple[int, PokemonInfo]]:
+        return self._page(offset, limit, after_id, name, published)
+
+    def update(self, id: int, info: PokemonInfo) -> PokemonEntity | None:
+        return self._shard_for(id).update(id, info)
+
+    def update_many(
+        self,
+        items: Iterable[tuple[int, PokemonInfo]],
+    ) -> list[PokemonEntity | None]:
+        return self._scatter(
+            [(id, (id, info)) for id, info in items],
+            lambda shard, batch: shard.update_many(batch),
+        )
+
+    def upsert(self, id: int, info: PokemonInfo) -> PokemonEntity:
+        return self._shard_for(id).upsert(id, info)
+
+    def upsert_many(
+        self,
+        items: Iterable[tuple[int, PokemonInfo]],
+    ) -> list[PokemonEntity]:
+        return self._scatter(
+            [(id, (id, info)) for id, info in items],
+            lambda shard, batch: shard.upsert_many(batch),
+        )
+
+    def patch(self, id: int, patch_info: PatchPokemonInfo) -> PokemonEntity | None:
+        return self._shard_for(id).patch(id, patch_info)
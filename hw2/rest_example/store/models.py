@@ -11,6 +11,7 @@ class PokemonInfo:
 class PokemonEntity:
     id: int
     info: PokemonInfo
+    version: int = 0
 
 
 @dataclass(slots=True)
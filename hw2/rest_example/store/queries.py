@@ -1,75 +1,82 @@
 from typing import Iterable
 
+from hw2.rest_example.store.backend import StoreBackend
+from hw2.rest_example.store.memory import MemoryStore
 from hw2.rest_example.store.models import (
     PatchPokemonInfo,
     PokemonEntity,
     PokemonInfo,
 )
 
-_data = dict[int, PokemonInfo]()
+_backend: StoreBackend = MemoryStore()
 
 
-def int_id_generator() -> Iterable[int]:
-    i = 0
-    while True:
-        yield i
-        i += 1
+def use_backend(backend: StoreBackend) -> None:
+    global _backend
+    _backend = backend
 
 
-_id_generator = int_id_generator()
+def collection_version() -> int:
+    return _backend.collection_version()
 
 
 def add(info: PokemonInfo) -> PokemonEntity:
-    _id = next(_id_generator)
-    _data[_id] = info
+    return _backend.add(info)
 
-    return PokemonEntity(_id, info)
+
+def add_many(infos: Iterable[PokemonInfo]) -> list[PokemonEntity]:
+    return _backend.add_many(infos)
 
 
 def delete(id: int) -> None:
-    if id in _data:
-        del _data[id]
+    _backend.delete(id)
+
+
+def delete_many(ids: Iterable[int]) -> list[bool]:
+    return _backend.delete_many(ids)
 
 
 def get_one(id: int) -> PokemonEntity | None:
-    if id not in _data:
-        return None
+    return _backend.get_one(id)
 
-    return PokemonEntity(id=id, info=_data[id])
 
+def get_many(
+    offset: int = 0,
+    limit: int = 10,
+    after_id: int | None = None,
+    name: str | None = None,
+    published: bool | None = None,
+) -> Iterable[PokemonEntity]:
+    return _backend.get_many(offset, limit, after_id, name, published)
 
-def get_many(offset: int = 0, limit: int = 10) -> Iterable[PokemonEntity]:
-    curr = 0
-    for id, info in _data.items():
-        if offset <= curr < offset + limit:
-            yield PokemonEntity(id, info)
 
-        curr += 1
+def get_rows(
+    offset: int = 0,
+    limit: int = 10,
+    after_id: int | None = None,
+    name: str | None = None,
+    published: bool | None = None,
+) -> list[tuple[int, PokemonInfo]]:
+    return _backend.get_rows(offset, limit, after_id, name, published)
 
 
 def update(id: int, info: PokemonInfo) -> PokemonEntity | None:
-    if id not in _data:
-        return None
+    return _backend.update(id, info)
 
-    _data[id] = info
 
-    return PokemonEntity(id=id, info=info)
+def update_many(
+    items: Iterable[tuple[int, PokemonInfo]],
+) -> list[PokemonEntity | None]:
+    return _backend.update_many(items)
 
 
 def upsert(id: int, info: PokemonInfo) -> PokemonEntity:
-    _data[id] = info
+    return _backend.upsert(id, info)
 
-    return PokemonEntity(id=id, info=info)
 
+def upsert_many(items: Iterable[tuple[int, PokemonInfo]]) -> list[PokemonEntity]:
+    return _backend.upsert_many(items)
 
-def patch(id: int, patch_info: PatchPokemonInfo) -> PokemonEntity | None:
-    if id not in _data:
-        return None
 
-    if patch_info.name is not None:
-        _data[id].name = patch_info.name
-
-    if patch_info.published is not None:
-        _data[id].published = patch_info.published
-
-    return PokemonEntity(id=id, info=_data[id])
+def patch(id: int, patch_info: PatchPokemonInfo) -> PokemonEntity | None:
+    return _backend.patch(id, patch_info)
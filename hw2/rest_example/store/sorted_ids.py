@@ -0,0 +1,120 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, chain, islice
+from typing import Iterable, Iterator
+
+
+class SortedIds:
+    """Sorted set of ids split into buckets of at most `2 * load` items.
+
+    A flat sorted list pays an O(N) memmove for every insert or delete in the
+    middle, which adds up once an index holds millions of ids (e.g. flipping
+    `published` moves an id between two huge lists). Buckets bound that cost
+    by the bucket size, while rank lookups stay logarithmic through `_maxes`
+    and lazily rebuilt bucket offsets.
+    """
+
+    def __init__(self, ids: Iterable[int] = (), load: int = 1000) -> None:
+        self._load = load
+        self._lists = list[list[int]]()
+        self._maxes = list[int]()
+        self._offsets: list[int] | None = None
+        self._len = 0
+
+        # `ids` must already be sorted and unique
+        it = iter(ids)
+        while chunk := list(islice(it, load)):
+            self._lists.append(chunk)
+            self._maxes.append(chunk[-1])
+            self._len += len(chunk)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        return chain.from_iterable(self._lists)
+
+    def first(self) -> int:
+        return self._lists[0][0]
+
+    def last(self) -> int:
+        return self._maxes[-1]
+
+    def add(self, id: int) -> None:
+        if not self._lists:
+            self._lists.append([id])
+            self._maxes.append(id)
+        else:
+            pos = bisect_left(self._maxes, id)
+            if pos == len(self._maxes):
+                # ids from the generator only grow, so the common case is an append
+                pos -= 1
+                self._lists[pos].append(id)
+                self._maxes[pos] = id
+            else:
+                insort(self._lists[pos], id)
+
+            if len(self._lists[pos]) > 2 * self._load:
+                bucket = self._lists[pos]
+                self._lists[pos : pos + 1] = [bucket[: self._load], bucket[self._load :]]
+                self._maxes[pos : pos + 1] = [bucket[self._load - 1], bucket[-1]]
+
+        self._len += 1
+        self._offsets = None
+
+    def remove(self, id: int) -> bool:
+        pos = bisect_left(self._maxes, id)
+        if pos == len(self._maxes):
+            return False
+
+        bucket = self._lists[pos]
+        i = bisect_left(bucket, id)
+        if bucket[i] != id:
+            return False
+
+        del bucket[i]
+        if bucket:
+            self._maxes[pos] = bucket[-1]
+        else:
+            del self._lists[pos]
+            del self._maxes[pos]
+
+        self._len -= 1
+        self._offsets = None
+        return True
+
+    def _bucket_offsets(self) -> list[int]:
+        if self._offsets is None:
+            self._offsets = [0, *accumulate(len(bucket) for bucket in self._lists)]
+
+        return self._offsets
+
+    def rank(self, id: int) -> int:
+        """Number of ids less than or equal to `id`."""
+        pos = bisect_right(self._maxes, id)
+        if pos == len(self._maxes):
+            return self._len
+
+        return self._bucket_offsets()[pos] + bisect_right(self._lists[pos], id)
+
+    def rank_left(self, id: int) -> int:
+        """Number of ids strictly less than `id`."""
+        pos = bisect_left(self._maxes, id)
+        if pos == len(self._maxes):
+            return self._len
+
+        return self._bucket_offsets()[pos] + bisect_left(self._lists[pos], id)
+
+    def slice(self, start: int, limit: int) -> list[int]:
+        if start >= self._len or limit <= 0:
+            return []
+
+        offsets = self._bucket_offsets()
+        pos = bisect_right(offsets, start) - 1
+
+        result = self._lists[pos][start - offsets[pos] : start - offsets[pos] + limit]
+        for bucket in islice(self._lists, pos + 1, None):
+            if len(result) >= limit:
+                break
+            result.extend(bucket[: limit - len(result)])
+
+        return result
@@ -0,0 +1,144 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+from random import Random
+
+import pytest
+
+from hw2.rest_example.store import (
+    DurableStore,
+    MemoryStore,
+    PokemonInfo,
+    ShardedMemoryStore,
+)
+from hw2.rest_example.store.sorted_ids import SortedIds
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _run_and_kill(directory: Path, code: str) -> None:
+    """Runs `code` against a DurableStore in `directory`, then kills the process."""
+    script = textwrap.dedent(f"""
+        import os
+        from hw2.rest_example.store import DurableStore, PatchPokemonInfo, PokemonInfo
+
+        store = DurableStore({str(directory)!r}, fsync_every=1_000_000, fsync_interval=3600)
+    """) + textwrap.dedent(code) + "\nos._exit(0)\n"
+
+    subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": str(REPO_ROOT)},
+        check=True,
+    )
+
+
+def test_acknowledged_writes_survive_process_crash(tmp_path: Path):
+    _run_and_kill(tmp_path, """
+        for i in range(10):
+            store.add(PokemonInfo(name=f"pokemon-{i}", published=i % 2 == 0))
+        store.patch(3, PatchPokemonInfo(published=True))
+        store.delete(5)
+    """)
+
+    store = DurableStore(tmp_path)
+    try:
+        rows = store.get_rows(0, 100)
+        assert [id for id, _ in rows] == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+        assert store.get_one(3).info.published
+        # ids of deleted rows are not handed out again
+        assert store.add(PokemonInfo(name="new", published=False)).id == 10
+    finally:
+        store.close()
+
+
+def test_pending_records_are_synced_without_further_writes(tmp_path: Path):
+    store = DurableStore(tmp_path, fsync_every=1_000_000, fsync_interval=0.01)
+    try:
+        store.add(PokemonInfo(name="pokemon", published=False))
+
+        deadline = time.monotonic() + 5
+        while store._unsynced and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert store._unsynced == 0
+    finally:
+        store.close()
+
+
+@pytest.mark.parametrize("shards", [1, 3, 8])
+def test_sharded_pages_match_single_store(shards: int):
+    rnd = Random(shards)
+
+    for _ in range(20):
+        single, sharded = MemoryStore(), ShardedMemoryStore(shards)
+        for _ in range(rnd.randrange(400)):
+            id = rnd.randrange(1000)
+            info = PokemonInfo(name=rnd.choice("abc"), published=rnd.random() < 0.5)
+            single.upsert(id, info)
+            sharded.upsert(id, info)
+
+        for _ in range(150):
+            query = (
+                rnd.randrange(500),
+                rnd.randrange(1, 30),
+                rnd.choice([None, rnd.randrange(-5, 1005)]),
+                rnd.choice([None, "a", "b"]),
+                rnd.choice([None, True, False]),
+            )
+            assert sharded.get_rows(*query) == single.get_rows(*query), query
+
+
+def test_sharded_filtered_page_skips_rows_deleted_concurrently():
+    store = ShardedMemoryStore(8)
+    stop = threading.Event()
+
+    def churn():
+        rnd = Random(0)
+        while not stop.is_set():
+            id = rnd.randrange(200)
+            if rnd.random() < 0.5:
+                store.delete(id)
+            else:
+                store.upsert(id, PokemonInfo(name="a", published=False))
+
+    writer = threading.Thread(target=churn)
+    writer.start()
+    try:
+        for _ in range(5000):
+            ids = [id for id, _ in store.get_rows(0, 10, None, "a", None)]
+            assert ids == sorted(set(ids))
+    finally:
+        stop.set()
+        writer.join()
+
+
+def test_sorted_ids_match_a_sorted_list():
+    rnd = Random(0)
+    # a small load, so buckets get split and emptied all the time
+    ids, expected = SortedIds(range(0, 100, 3), load=4), list(range(0, 100, 3))
+
+    for _ in range(5000):
+        id = rnd.randrange(-10, 200)
+        if rnd.random() < 0.5:
+            if id not in expected:
+                ids.add(id)
+                expected.append(id)
+                expected.sort()
+        else:
+            assert ids.remove(id) == (id in expected)
+            if id in expected:
+                expected.remove(id)
+
+        assert len(ids) == len(expected)
+        assert ids.rank(id) == sum(1 for other in expected if other <= id)
+        assert ids.rank_left(id) == sum(1 for other in expected if other < id)
+
+        start, limit = rnd.randrange(len(expected) + 2), rnd.randrange(1, 20)
+        assert ids.slice(start, limit) == expected[start : start + limit]
+
+    assert list(ids) == expected
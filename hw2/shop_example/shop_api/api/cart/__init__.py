@@ -0,0 +1,8 @@
+from .contracts import CartItemResponse, CartResponse
+from .routes import router
+
+__all__ = [
+    "CartItemResponse",
+    "CartResponse",
+    "router",
+]
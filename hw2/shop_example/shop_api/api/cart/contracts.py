@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+from shop_api.store.models import CartEntity, CartItemInfo
+
+
+class CartItemResponse(BaseModel):
+    id: int
+    name: str
+    quantity: int
+    available: bool
+
+    @staticmethod
+    def from_info(info: CartItemInfo) -> CartItemResponse:
+        return CartItemResponse(
+            id=info.id,
+            name=info.name,
+            quantity=info.quantity,
+            available=info.available,
+        )
+
+
+class CartResponse(BaseModel):
+    id: int
+    items: list[CartItemResponse]
+    price: float
+
+    @staticmethod
+    def from_entity(entity: CartEntity) -> CartResponse:
+        return CartResponse(
+            id=entity.id,
+            items=[CartItemResponse.from_info(item) for item in entity.info.items],
+            price=entity.info.price,
+        )
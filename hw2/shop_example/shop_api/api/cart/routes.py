@@ -0,0 +1,126 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from pydantic import NonNegativeFloat, NonNegativeInt, PositiveInt
+
+from shop_api import store
+from shop_api.api.etag import is_not_modified, make_etag
+
+from .contracts import CartResponse
+
+router = APIRouter(prefix="/cart")
+
+
+@router.post(
+    "",
+    status_code=HTTPStatus.CREATED,
+)
+async def post_cart(response: Response) -> CartResponse:
+    entity = store.create_cart()
+
+    # as REST states one should provide uri to newly created resource in location header
+    response.headers["location"] = f"/cart/{entity.id}"
+
+    return CartResponse.from_entity(entity)
+
+
+@router.get(
+    "/{id}",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully returned requested cart",
+        },
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "Cart did not change since the version in If-None-Match",
+        },
+        HTTPStatus.NOT_FOUND: {
+            "description": "Failed to return requested cart as one was not found",
+        },
+    },
+)
+async def get_cart_by_id(
+    id: int,
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> CartResponse:
+    # the version is checked before the cart is assembled from its items
+    version = store.get_cart_version(id)
+
+    if version is None:
+        raise HTTPException(
+            HTTPStatus.NOT_FOUND,
+            f"Request resource /cart/{id} was not found",
+        )
+
+    etag = make_etag(id, version)
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"etag": etag})
+
+    entity = store.get_cart(id)
+    assert entity is not None  # existence was checked with the version
+
+    response.headers["etag"] = etag
+
+    return CartResponse.from_entity(entity)
+
+
+@router.get(
+    "",
+    response_model=list[CartResponse],
+    responses={
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "Nothing changed since the version in If-None-Match",
+        },
+    },
+)
+async def get_cart_list(
+    response: Response,
+    offset: Annotated[NonNegativeInt, Query()] = 0,
+    limit: Annotated[PositiveInt, Query()] = 10,
+    min_price: Annotated[NonNegativeFloat | None, Query()] = None,
+    max_price: Annotated[NonNegativeFloat | None, Query()] = None,
+    min_quantity: Annotated[NonNegativeInt | None, Query()] = None,
+    max_quantity: Annotated[NonNegativeInt | None, Query()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> list[CartResponse] | Response:
+    etag = make_etag(store.collection_version())
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"etag": etag})
+
+    response.headers["etag"] = etag
+
+    return [
+        CartResponse.from_entity(e)
+        for e in store.get_carts(
+            offset,
+            limit,
+            min_price,
+            max_price,
+            min_quantity,
+            max_quantity,
+        )
+    ]
+
+
+@router.post(
+    "/{cart_id}/add/{item_id}",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully added item to cart",
+        },
+        HTTPStatus.NOT_FOUND: {
+            "description": "Failed to add item as cart or item was not found",
+        },
+    },
+)
+async def add_item_to_cart(cart_id: int, item_id: int) -> CartResponse:
+    entity = store.add_to_cart(cart_id, item_id)
+
+    if entity is None:
+        raise HTTPException(
+            HTTPStatus.NOT_FOUND,
+            f"Requested resource /cart/{cart_id} or /item/{item_id} was not found",
+        )
+
+    return CartResponse.from_entity(entity)
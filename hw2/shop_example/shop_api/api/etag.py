@@ -0,0 +1,20 @@
+# a copy of hw2/rest_example/api/etag.py, keep the two in sync: the shop is
+# run and tested with only hw2/shop_example on the path and cannot import it
+
+
+def make_etag(*parts: object) -> str:
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def is_not_modified(if_none_match: str | None, etag: str) -> bool:
+    """Checks If-None-Match against `etag` with the weak comparison of RFC 9110."""
+    if if_none_match is None:
+        return False
+
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
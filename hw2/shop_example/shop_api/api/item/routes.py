@@ -0,0 +1,143 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from pydantic import NonNegativeFloat, NonNegativeInt, PositiveInt
+
+from shop_api import store
+from shop_api.api.etag import is_not_modified, make_etag
+
+from .contracts import ItemRequest, ItemResponse, PatchItemRequest
+
+router = APIRouter(prefix="/item")
+
+
+@router.post(
+    "",
+    status_code=HTTPStatus.CREATED,
+)
+async def post_item(info: ItemRequest, response: Response) -> ItemResponse:
+    entity = store.add_item(info.as_item_info())
+
+    # as REST states one should provide uri to newly created resource in location header
+    response.headers["location"] = f"/item/{entity.id}"
+
+    return ItemResponse.from_entity(entity)
+
+
+@router.get(
+    "/{id}",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully returned requested item",
+        },
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "Item did not change since the version in If-None-Match",
+        },
+        HTTPStatus.NOT_FOUND: {
+            "description": "Failed to return requested item as one was not found",
+        },
+    },
+)
+async def get_item_by_id(
+    id: int,
+    response: Response,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> ItemResponse:
+    entity = store.get_item(id)
+
+    if not entity or entity.info.deleted:
+        raise HTTPException(
+            HTTPStatus.NOT_FOUND,
+            f"Request resource /item/{id} was not found",
+        )
+
+    etag = make_etag(entity.id, entity.version)
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"etag": etag})
+
+    response.headers["etag"] = etag
+
+    return ItemResponse.from_entity(entity)
+
+
+@router.get(
+    "",
+    response_model=list[ItemResponse],
+    responses={
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "Nothing changed since the version in If-None-Match",
+        },
+    },
+)
+async def get_item_list(
+    response: Response,
+    offset: Annotated[NonNegativeInt, Query()] = 0,
+    limit: Annotated[PositiveInt, Query()] = 10,
+    min_price: Annotated[NonNegativeFloat | None, Query()] = None,
+    max_price: Annotated[NonNegativeFloat | None, Query()] = None,
+    show_deleted: Annotated[bool, Query()] = False,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> list[ItemResponse] | Response:
+    etag = make_etag(store.collection_version())
+    if is_not_modified(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers={"etag": etag})
+
+    response.headers["etag"] = etag
+
+    return [
+        ItemResponse.from_entity(e)
+        for e in store.get_items(offset, limit, min_price, max_price, show_deleted)
+    ]
+
+
+@router.put(
+    "/{id}",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully replaced item",
+        },
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "Failed to replace item as one was not found or deleted",
+        },
+    },
+)
+async def put_item(id: int, info: ItemRequest) -> ItemResponse:
+    entity = store.replace_item(id, info.as_item_info())
+
+    if entity is None:
+        raise HTTPException(
+            HTTPStatus.NOT_MODIFIED,
+            f"Requested resource /item/{id} was not found",
+        )
+
+    return ItemResponse.from_entity(entity)
+
+
+@router.patch(
+    "/{id}",
+    responses={
+        HTTPStatus.OK: {
+            "description": "Successfully patched item",
+        },
+        HTTPStatus.NOT_MODIFIED: {
+            "description": "Failed to patch item as one was not found or deleted",
+        },
+    },
+)
+async def patch_item(id: int, info: PatchItemRequest) -> ItemResponse:
+    entity = store.patch_item(id, info.as_patch_item_info())
+
+    if entity is None:
+        raise HTTPException(
+            HTTPStatus.NOT_MODIFIED,
+            f"Requested resource /item/{id} was not found",
+        )
+
+    return ItemResponse.from_entity(entity)
+
+
+@router.delete("/{id}")
+async def delete_item(id: int) -> Response:
+    store.delete_item(id)
+    return Response("")
@@ -0,0 +1,16 @@
+import os
+
+from fastapi import FastAPI
+
+from shop_api.api import profiling
+from shop_api.api.cart import router as cart_router
+from shop_api.api.item import router as item_router
+
+app = FastAPI(title="Shop API")
+
+app.include_router(cart_router)
+app.include_router(item_router)
+
+if os.getenv("SHOP_PROFILING") == "1":
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(profiling.router)
@@ -0,0 +1,43 @@
+from .models import (
+    CartEntity,
+    CartInfo,
+    CartItemInfo,
+    ItemEntity,
+    ItemInfo,
+    PatchItemInfo,
+)
+from .queries import (
+    add_item,
+    add_to_cart,
+    collection_version,
+    create_cart,
+    delete_item,
+    get_cart,
+    get_cart_version,
+    get_carts,
+    get_item,
+    get_items,
+    patch_item,
+    replace_item,
+)
+
+__all__ = [
+    "CartEntity",
+    "CartInfo",
+    "CartItemInfo",
+    "ItemEntity",
+    "ItemInfo",
+    "PatchItemInfo",
+    "add_item",
+    "add_to_cart",
+    "collection_version",
+    "create_cart",
+    "delete_item",
+    "get_cart",
+    "get_cart_version",
+    "get_carts",
+    "get_item",
+    "get_items",
+    "patch_item",
+    "replace_item",
+]
@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class ItemInfo:
+    name: str
+    price: float
+    deleted: bool = False
+
+
+@dataclass(slots=True)
+class ItemEntity:
+    id: int
+    info: ItemInfo
+    version: int = 0
+
+
+@dataclass(slots=True)
+class PatchItemInfo:
+    name: str | None = None
+    price: float | None = None
+
+
+@dataclass(slots=True)
+class CartItemInfo:
+    id: int
+    name: str
+    quantity: int
+    available: bool
+
+
+@dataclass(slots=True)
+class CartInfo:
+    items: list[CartItemInfo]
+    price: float
+
+
+@dataclass(slots=True)
+class CartEntity:
+    id: int
+    info: CartInfo
+    version: int = 0
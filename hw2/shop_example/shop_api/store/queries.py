@@ -0,0 +1,262 @@
+from dataclasses import dataclass
+from heapq import nsmallest
+from itertools import count, islice
+from math import fsum, inf
+from time import time_ns
+from typing import Iterable
+
+from shop_api.store.models import (
+    CartEntity,
+    CartInfo,
+    CartItemInfo,
+    ItemEntity,
+    ItemInfo,
+    PatchItemInfo,
+)
+from shop_api.store.sorted_keys import SortedKeys
+
+
+@dataclass(slots=True)
+class _Cart:
+    items: dict[int, CartItemInfo]  # item id -> line as shown in the cart
+    price: float = 0.0  # of available items only
+    quantity: int = 0
+
+
+_items = dict[int, ItemInfo]()
+_carts = dict[int, _Cart]()
+_carts_with_item = dict[int, dict[int, int]]()  # item id -> cart id -> quantity
+
+# (aggregate, cart id) kept sorted, so cart range filters are index range scans
+_carts_by_price = SortedKeys()
+_carts_by_quantity = SortedKeys()
+
+# every mutation takes the next value of a clock seeded with the current time,
+# so versions never repeat (even across restarts) and can be used as ETags
+_clock = count(time_ns())
+_version = next(_clock)
+_item_versions = dict[int, int]()
+_cart_versions = dict[int, int]()
+
+
+def int_id_generator() -> Iterable[int]:
+    i = 0
+    while True:
+        yield i
+        i += 1
+
+
+_item_id_generator = int_id_generator()
+_cart_id_generator = int_id_generator()
+
+
+def _touch_item(id: int) -> int:
+    global _version
+    _version = _item_versions[id] = next(_clock)
+    return _version
+
+
+def _touch_cart(id: int) -> int:
+    global _version
+    _version = _cart_versions[id] = next(_clock)
+    return _version
+
+
+def collection_version() -> int:
+    return _version
+
+
+def add_item(info: ItemInfo) -> ItemEntity:
+    _id = next(_item_id_generator)
+    _items[_id] = info
+
+    return ItemEntity(_id, info, _touch_item(_id))
+
+
+def get_item(id: int) -> ItemEntity | None:
+    if id not in _items:
+        return None
+
+    return ItemEntity(id, _items[id], _item_versions[id])
+
+
+def get_items(
+    offset: int = 0,
+    limit: int = 10,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    show_deleted: bool = False,
+) -> Iterable[ItemEntity]:
+    curr = 0
+    for id, info in _items.items():
+        if not show_deleted and info.deleted:
+            continue
+        if min_price is not None and info.price < min_price:
+            continue
+        if max_price is not None and info.price > max_price:
+            continue
+
+        if offset <= curr < offset + limit:
+            yield ItemEntity(id, info, _item_versions[id])
+
+        curr += 1
+
+
+def replace_item(id: int, info: ItemInfo) -> ItemEntity | None:
+    if id not in _items or _items[id].deleted:
+        return None
+
+    _items[id] = info
+    _update_carts_with(id)
+
+    return ItemEntity(id, info, _touch_item(id))
+
+
+def patch_item(id: int, patch_info: PatchItemInfo) -> ItemEntity | None:
+    if id not in _items or _items[id].deleted:
+        return None
+
+    if patch_info.name is not None:
+        _items[id].name = patch_info.name
+
+    if patch_info.price is not None:
+        _items[id].price = patch_info.price
+
+    _update_carts_with(id)
+
+    return ItemEntity(id, _items[id], _touch_item(id))
+
+
+def delete_item(id: int) -> None:
+    if id in _items and not _items[id].deleted:
+        _items[id].deleted = True
+        _update_carts_with(id)
+        _touch_item(id)
+
+
+def _set_cart_aggregates(id: int, cart: _Cart, price: float, quantity: int) -> None:
+    if price != cart.price:
+        _carts_by_price.remove((cart.price, id))
+        _carts_by_price.add((price, id))
+        cart.price = price
+
+    if quantity != cart.quantity:
+        _carts_by_quantity.remove((cart.quantity, id))
+        _carts_by_quantity.add((quantity, id))
+        cart.quantity = quantity
+
+
+def _cart_price(cart: _Cart) -> float:
+    # summed again from the lines rather than adjusted by the price delta, so
+    # float error does not build up over repeated price changes
+    return fsum(
+        _items[line.id].price * line.quantity
+        for line in cart.items.values()
+        if line.available
+    )
+
+
+def _update_carts_with(item_id: int) -> None:
+    # carts cache their lines and totals, so an item change is pushed to the
+    # carts holding it (found through the reverse index) and reads of a cart
+    # never look items up again
+    item = _items[item_id]
+
+    for cart_id, quantity in _carts_with_item.get(item_id, {}).items():
+        cart = _carts[cart_id]
+        cart.items[item_id] = CartItemInfo(
+            item_id, item.name, quantity, not item.deleted
+        )
+
+        _set_cart_aggregates(cart_id, cart, _cart_price(cart), cart.quantity)
+        _touch_cart(cart_id)
+
+
+def _cart_info(cart: _Cart) -> CartInfo:
+    return CartInfo(list(cart.items.values()), cart.price)
+
+
+def create_cart() -> CartEntity:
+    _id = next(_cart_id_generator)
+    _carts[_id] = _Cart({})
+    _carts_by_price.add((0.0, _id))
+    _carts_by_quantity.add((0, _id))
+
+    return CartEntity(_id, CartInfo([], 0.0), _touch_cart(_id))
+
+
+def get_cart_version(id: int) -> int | None:
+    if id not in _carts:
+        return None
+
+    return _cart_versions[id]
+
+
+def get_cart(id: int) -> CartEntity | None:
+    if id not in _carts:
+        return None
+
+    return CartEntity(id, _cart_info(_carts[id]), _cart_versions[id])
+
+
+def _range_scan(index: SortedKeys, lo: float | None, hi: float | None) -> Iterable[int]:
+    start = 0 if lo is None else index.rank_left((lo,))
+    stop = len(index) if hi is None else index.rank((hi, inf))
+
+    return (id for _, id in index.range(start, stop))
+
+
+def get_carts(
+    offset: int = 0,
+    limit: int = 10,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    min_quantity: int | None = None,
+    max_quantity: int | None = None,
+) -> Iterable[CartEntity]:
+    """Carts in id (creation) order, whatever filters are given.
+
+    The price index drives the scan when a price range is given, otherwise
+    the quantity one; the remaining range is checked on cached aggregates.
+    Index scans come in aggregate order, so the page is picked from their
+    matches by id, keeping `offset` stable across filter combinations.
+    """
+    if min_price is not None or max_price is not None:
+        ids = _range_scan(_carts_by_price, min_price, max_price)
+    elif min_quantity is not None or max_quantity is not None:
+        ids = _range_scan(_carts_by_quantity, min_quantity, max_quantity)
+    else:
+        ids = None
+
+    def matches(cart: _Cart) -> bool:
+        return (
+            (min_quantity is None or cart.quantity >= min_quantity)
+            and (max_quantity is None or cart.quantity <= max_quantity)
+            and (min_price is None or cart.price >= min_price)
+            and (max_price is None or cart.price <= max_price)
+        )
+
+    if ids is None:
+        # dict order is id order, ids only grow and carts are never removed
+        page = islice(_carts, offset, offset + limit)
+    else:
+        page = nsmallest(offset + limit, (id for id in ids if matches(_carts[id])))[offset:]
+
+    for id in page:
+        yield CartEntity(id, _cart_info(_carts[id]), _cart_versions[id])
+
+
+def add_to_cart(cart_id: int, item_id: int) -> CartEntity | None:
+    if cart_id not in _carts or item_id not in _items:
+        return None
+
+    item = _items[item_id]
+    carts = _carts_with_item.setdefault(item_id, {})
+    carts[cart_id] = quantity = carts.get(cart_id, 0) + 1
+
+    cart = _carts[cart_id]
+    cart.items[item_id] = CartItemInfo(item_id, item.name, quantity, not item.deleted)
+
+    _set_cart_aggregates(cart_id, cart, _cart_price(cart), cart.quantity + 1)
+
+    return CartEntity(cart_id, _cart_info(cart), _touch_cart(cart_id))
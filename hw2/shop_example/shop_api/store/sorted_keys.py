@@ -0,0 +1,100 @@
+# adapted from hw2/rest_example/store/sorted_ids.py for (aggregate, id) keys
+from bisect import bisect_left, bisect_right, insort
+from itertools import accumulate, chain, islice
+from typing import Iterator
+
+Key = tuple[float, int]
+
+
+class SortedKeys:
+    """Sorted set of (aggregate, id) keys split into buckets of at most `2 * load`.
+
+    A flat sorted list pays an O(N) memmove for every insert or delete in the
+    middle, and every change of a cart's price or quantity is one of each.
+    Buckets bound that cost by the bucket size, while range lookups stay
+    logarithmic through `_maxes` and lazily rebuilt bucket offsets.
+    """
+
+    def __init__(self, load: int = 1000) -> None:
+        self._load = load
+        self._lists = list[list[Key]]()
+        self._maxes = list[Key]()
+        self._offsets: list[int] | None = None
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Key]:
+        return chain.from_iterable(self._lists)
+
+    def add(self, key: Key) -> None:
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+        else:
+            pos = bisect_left(self._maxes, key)
+            if pos == len(self._maxes):
+                pos -= 1
+                self._lists[pos].append(key)
+                self._maxes[pos] = key
+            else:
+                insort(self._lists[pos], key)
+
+            if len(self._lists[pos]) > 2 * self._load:
+                bucket = self._lists[pos]
+                self._lists[pos : pos + 1] = [bucket[: self._load], bucket[self._load :]]
+                self._maxes[pos : pos + 1] = [bucket[self._load - 1], bucket[-1]]
+
+        self._len += 1
+        self._offsets = None
+
+    def remove(self, key: Key) -> None:
+        pos = bisect_left(self._maxes, key)
+        bucket = self._lists[pos]
+        del bucket[bisect_left(bucket, key)]
+
+        if bucket:
+            self._maxes[pos] = bucket[-1]
+        else:
+            del self._lists[pos]
+            del self._maxes[pos]
+
+        self._len -= 1
+        self._offsets = None
+
+    def _bucket_offsets(self) -> list[int]:
+        if self._offsets is None:
+            self._offsets = [0, *accumulate(len(bucket) for bucket in self._lists)]
+
+        return self._offsets
+
+    def rank_left(self, key: tuple) -> int:
+        """Number of keys strictly less than `key`."""
+        pos = bisect_left(self._maxes, key)
+        if pos == len(self._maxes):
+            return self._len
+
+        return self._bucket_offsets()[pos] + bisect_left(self._lists[pos], key)
+
+    def rank(self, key: tuple) -> int:
+        """Number of keys less than or equal to `key`."""
+        pos = bisect_right(self._maxes, key)
+        if pos == len(self._maxes):
+            return self._len
+
+        return self._bucket_offsets()[pos] + bisect_right(self._lists[pos], key)
+
+    def range(self, start: int, stop: int) -> Iterator[Key]:
+        """Keys with ranks in [start, stop)."""
+        if start >= stop:
+            return iter(())
+
+        offsets = self._bucket_offsets()
+        pos = bisect_right(offsets, start) - 1
+        first = self._lists[pos][start - offsets[pos] :]
+
+        return islice(
+            chain(first, chain.from_iterable(islice(self._lists, pos + 1, None))),
+            stop - start,
+        )
@@ -0,0 +1,138 @@
+"""Fan-out latency of the broadcaster with simulated subscribers.
+
+    python benchmark.py [--subscribers 10000] [--messages 100] [--slow 0.01]
+
+Subscribers are in-process stand-ins for WebSocket connections: sending
+takes `--send-delay` for a healthy client and `--slow-delay` for the
+`--slow` share of them. Latency is measured from publish to the moment a
+send finished, over healthy subscribers only, and compared against the
+old broadcaster that awaited every send in turn.
+"""
+
+import argparse
+import asyncio
+import random
+from time import perf_counter_ns
+
+from server import Broadcaster, SlowConsumerPolicy
+
+
+class FakeWebSocket:
+    def __init__(self, delay: float, latencies: list[int] | None) -> None:
+        self._delay = delay
+        # None for slow clients, their latency is not what we measure
+        self._latencies = latencies
+
+    async def accept(self) -> None:
+        pass
+
+    async def send_text(self, message: str) -> None:
+        # a healthy client's send only fills the socket buffer and returns
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        if self._latencies is not None:
+            self._latencies.append(perf_counter_ns() - int(message))
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+class SequentialBroadcaster:
+    """The broadcaster as it was: awaits each subscriber in turn."""
+
+    def __init__(self) -> None:
+        self.subscribers = list[FakeWebSocket]()
+
+    async def subscribe(self, ws: FakeWebSocket) -> None:
+        await ws.accept()
+        self.subscribers.append(ws)
+
+    async def publish(self, message: str) -> None:
+        for ws in self.subscribers:
+            await ws.send_text(message)
+
+
+def percentile(values: list[int], p: float) -> float:
+    values.sort()
+    return values[min(len(values) - 1, int(len(values) * p / 100))] / 1_000_000
+
+
+async def run(broadcaster, args: argparse.Namespace) -> None:
+    latencies = list[int]()
+    publish_times = list[int]()
+
+    for _ in range(args.subscribers):
+        slow = random.random() < args.slow
+        await broadcaster.subscribe(
+            FakeWebSocket(
+                args.slow_delay if slow else args.send_delay,
+                None if slow else latencies,
+            )
+        )
+
+    expected = args.messages * sum(
+        ws._latencies is not None for ws in _sockets(broadcaster)
+    )
+    for _ in range(args.messages):
+        started = perf_counter_ns()
+        await broadcaster.publish(str(started))
+        publish_times.append(perf_counter_ns() - started)
+        await asyncio.sleep(args.interval)
+
+    # let the writers drain, slow subscribers are not waited for
+    while len(latencies) < expected:
+        await asyncio.sleep(0.001)
+
+    dropped = disconnected = 0
+    if isinstance(broadcaster, Broadcaster):
+        dropped = sum(s.dropped for s in broadcaster.subscribers.values())
+        disconnected = broadcaster.disconnected
+    print(
+        f"{type(broadcaster).__name__:<22} "
+        f"fan-out p50 {percentile(latencies, 50):8.2f} ms  "
+        f"p99 {percentile(latencies, 99):8.2f} ms  "
+        f"publish p99 {percentile(publish_times, 99):8.2f} ms  "
+        f"dropped {dropped}  disconnected {disconnected}"
+    )
+
+    if isinstance(broadcaster, Broadcaster):
+        for ws in list(broadcaster.subscribers):
+            broadcaster.unsubscribe(ws)
+
+
+def _sockets(broadcaster) -> list[FakeWebSocket]:
+    if isinstance(broadcaster, Broadcaster):
+        return [subscriber.ws for subscriber in broadcaster.subscribers.values()]
+    return broadcaster.subscribers
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=10_000)
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--interval", type=float, default=0.01, help="s between messages")
+    parser.add_argument("--send-delay", type=float, default=0, help="s per send, healthy client")
+    parser.add_argument("--slow", type=float, default=0.01, help="share of slow subscribers")
+    parser.add_argument("--slow-delay", type=float, default=0.05, help="s per send, slow client")
+    parser.add_argument("--queue-size", type=int, default=100)
+    parser.add_argument(
+        "--policy",
+        choices=[policy.value for policy in SlowConsumerPolicy],
+        default=SlowConsumerPolicy.DROP_OLDEST.value,
+    )
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="also run the old broadcaster, slow with many subscribers",
+    )
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> None:
+    await run(Broadcaster(args.queue_size, SlowConsumerPolicy(args.policy)), args)
+    if args.sequential:
+        await run(SequentialBroadcaster(), args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
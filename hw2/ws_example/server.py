@@ -1,28 +1,117 @@
+import asyncio
+import os
+from collections import deque
+from contextlib import suppress
 from dataclasses import dataclass, field
+from enum import Enum
 from uuid import uuid4
 
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, status
 
 app = FastAPI()
 
 
+class SlowConsumerPolicy(str, Enum):
+    # the subscriber misses the oldest undelivered message but stays connected
+    DROP_OLDEST = "drop_oldest"
+    # the subscriber is disconnected and has to reconnect and catch up itself
+    DISCONNECT = "disconnect"
+
+
+@dataclass(slots=True)
+class Subscriber:
+    ws: WebSocket
+    # bounded, appending to a full one drops the oldest message
+    pending: deque[str]
+    # set while the writer has sent everything and waits for more
+    wakeup: asyncio.Future[None] | None = None
+    writer: asyncio.Task | None = None
+    dropped: int = 0
+
+
 @dataclass(slots=True)
 class Broadcaster:
-    subscribers: list[WebSocket] = field(init=False, default_factory=list)
+    """Fans messages out to subscribers without waiting for any of them.
+
+    Every subscriber has a bounded queue drained by its own writer task, so
+    publish only enqueues: a slow client delays nobody but itself, and once
+    its queue is full `policy` decides what happens to it.
+
+    The queue is a plain deque rather than asyncio.Queue: publish runs once
+    per subscriber per message, and a future is only needed to wake a writer
+    that ran out of messages.
+    """
+
+    queue_size: int = 100
+    policy: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST
+    subscribers: dict[WebSocket, Subscriber] = field(init=False, default_factory=dict)
+    disconnected: int = field(init=False, default=0)
+    _closing: set[asyncio.Task] = field(init=False, default_factory=set)
 
     async def subscribe(self, ws: WebSocket) -> None:
         await ws.accept()
-        self.subscribers.append(ws)
+        subscriber = Subscriber(ws, deque(maxlen=self.queue_size))
+        subscriber.writer = asyncio.create_task(self._write(subscriber))
+        self.subscribers[ws] = subscriber
 
-    async def unsubscribe(self, ws: WebSocket) -> None:
-        self.subscribers.remove(ws)
+    def unsubscribe(self, ws: WebSocket) -> None:
+        subscriber = self.subscribers.pop(ws, None)
+        if subscriber is not None and subscriber.writer is not None:
+            subscriber.writer.cancel()
 
     async def publish(self, message: str) -> None:
-        for ws in self.subscribers:
-            await ws.send_text(message)
+        disconnect = self.policy is SlowConsumerPolicy.DISCONNECT
+
+        for subscriber in list(self.subscribers.values()):
+            pending = subscriber.pending
+            if len(pending) == self.queue_size:
+                if disconnect:
+                    self._disconnect(subscriber)
+                    continue
+                subscriber.dropped += 1
+
+            pending.append(message)
+            wakeup = subscriber.wakeup
+            if wakeup is not None and not wakeup.done():
+                subscriber.wakeup = None
+                wakeup.set_result(None)
+
+    def _disconnect(self, subscriber: Subscriber) -> None:
+        self.unsubscribe(subscriber.ws)
+        self.disconnected += 1
+        # the close frame waits behind whatever the client has not read yet,
+        # so it is sent in the background instead of stalling publish
+        task = asyncio.create_task(
+            self._close(subscriber.ws, status.WS_1013_TRY_AGAIN_LATER)
+        )
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _write(self, subscriber: Subscriber) -> None:
+        loop = asyncio.get_running_loop()
+        ws, pending = subscriber.ws, subscriber.pending
+
+        try:
+            while True:
+                while pending:
+                    await ws.send_text(pending.popleft())
+
+                subscriber.wakeup = loop.create_future()
+                await subscriber.wakeup
+        except Exception:
+            # the client is gone, its receive loop will notice the same
+            self.unsubscribe(subscriber.ws)
+
+    @staticmethod
+    async def _close(ws: WebSocket, code: int) -> None:
+        with suppress(Exception):
+            await ws.close(code)
 
 
-broadcaster = Broadcaster()
+broadcaster = Broadcaster(
+    queue_size=int(os.getenv("WS_QUEUE_SIZE", "100")),
+    policy=SlowConsumerPolicy(os.getenv("WS_SLOW_CONSUMER_POLICY", "drop_oldest")),
+)
 
 
 @app.post("/publish")
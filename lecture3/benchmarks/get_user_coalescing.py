@@ -0,0 +1,62 @@
+import asyncio
+import random
+import sys
+from itertools import accumulate
+from time import process_time
+
+from demo_service import store
+from demo_service.coalescing import SingleFlight
+from demo_service.contracts import UserRequest
+
+USERS = 10_000
+ROUNDS = 200
+
+
+def skewed_ids(count: int, concurrency: int) -> list[list[int]]:
+    # zipf-like: the k-th most popular user is asked for 1/k as often
+    weights = list(accumulate(1 / k for k in range(1, USERS + 1)))
+    return [
+        random.choices(range(USERS), cum_weights=weights, k=concurrency)
+        for _ in range(count)
+    ]
+
+
+async def direct(id: int) -> bytes | None:
+    # what /get-user did before: one lookup and one encoding per request
+    resource = store.select(id)
+    return None if resource is None else resource.model_dump_json().encode()
+
+
+def encode_users(ids) -> dict[int, bytes]:
+    return {
+        id: resource.model_dump_json().encode()
+        for id, resource in store.select_many(ids).items()
+    }
+
+
+async def run(get, batches: list[list[int]]) -> float:
+    started = process_time()
+    for ids in batches:
+        await asyncio.gather(*(get(id) for id in ids))
+
+    return (process_time() - started) / sum(map(len, batches)) * 1_000_000
+
+
+def main(concurrency: int) -> None:
+    for i in range(USERS):
+        store.insert(UserRequest(username=f"user-{i}", first_name="First", last_name="Last"))
+
+    batches = skewed_ids(ROUNDS, concurrency)
+    distinct = sum(len(set(ids)) for ids in batches) / ROUNDS
+
+    direct_us = asyncio.run(run(direct, batches))
+    coalesced_us = asyncio.run(run(SingleFlight(encode_users).get, batches))
+
+    print(f"users={USERS} concurrent lookups={concurrency} distinct ids per tick={distinct:.0f}")
+    print(f"{'path':>10} {'cpu us/lookup':>14}")
+    print(f"{'direct':>10} {direct_us:>14.2f}")
+    print(f"{'coalesced':>10} {coalesced_us:>14.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
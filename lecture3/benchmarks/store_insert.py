@@ -0,0 +1,79 @@
+import sys
+import tracemalloc
+from datetime import datetime
+from timeit import timeit
+
+from demo_service import store
+from demo_service.contracts import UserRequest, UserResource
+
+REPEAT = 100_000
+
+
+def pydantic_insert(users: dict[int, UserResource], id: int, user: UserRequest) -> bytes:
+    # the path store.insert and the API took before: dump the request,
+    # validate a new resource, then let FastAPI validate it against
+    # response_model once more before encoding it
+    resource = UserResource(uid=id, **user.model_dump())
+    users[id] = resource
+
+    return UserResource.model_validate(resource.model_dump()).model_dump_json()
+
+
+def record_insert(user: UserRequest) -> bytes:
+    return store.insert(user).model_dump_json()
+
+
+def request(i: int) -> UserRequest:
+    return UserRequest(
+        username=f"user-{i}",
+        first_name="First",
+        last_name="Last",
+        birthdate=datetime(2000, 1, 1),
+    )
+
+
+def us_per_op(fn) -> float:
+    return timeit(fn, number=REPEAT) / REPEAT * 1_000_000
+
+
+def retained_bytes_per_user(fill, users: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fill()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return (after - before) / users
+
+
+def main(users: int) -> None:
+    user = request(0)
+
+    pydantic_users = dict[int, UserResource]()
+    pydantic_us = us_per_op(lambda: pydantic_insert(pydantic_users, 0, user))
+    record_us = us_per_op(lambda: record_insert(user))
+
+    # retained memory is measured on fresh stores, the request objects are
+    # created up front so only what the store keeps is counted
+    requests = [request(i) for i in range(users)]
+
+    pydantic_users.clear()
+    pydantic_bytes = retained_bytes_per_user(
+        lambda: [pydantic_insert(pydantic_users, i, r) for i, r in enumerate(requests)],
+        users,
+    )
+
+    store._users.clear()
+    record_bytes = retained_bytes_per_user(
+        lambda: [record_insert(r) for r in requests],
+        users,
+    )
+
+    print(f"users={users}")
+    print(f"{'path':>10} {'us/insert':>10} {'bytes/user':>11}")
+    print(f"{'pydantic':>10} {pydantic_us:>10.2f} {pydantic_bytes:>11.0f}")
+    print(f"{'record':>10} {record_us:>10.2f} {record_bytes:>11.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
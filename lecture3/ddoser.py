@@ -1,44 +1,261 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from time import perf_counter
 
-import requests
+import httpx
 from faker import Faker
 
-faker = Faker()
+CREATE_USER = "/create-user"
+GET_USER = "/get-user"
 
 
-def create_users():
-    for _ in range(500):
-        user = faker.profile()
-        response = requests.post(
-            "http://localhost:8080/create-user",
-            json={
-                "username": user["username"],
-                "first_name": user["name"],
-                "last_name": "",
-            },
-        )
+class LatencyHistogram:
+    """Log-linear histogram of latencies in microseconds, like HdrHistogram.
 
-        print(response)
+    Values below `2 ** (sub_bits + 1)` us are kept exactly, larger ones are
+    bucketed with a relative error below `2 ** -sub_bits` (under 1% with the
+    default), so memory stays small however long the run is.
+    """
 
+    def __init__(self, sub_bits: int = 7) -> None:
+        self._sub_bits = sub_bits
+        self._counts = Counter[tuple[int, int]]()
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
 
-def get_users():
-    for _ in range(500):
+    def record(self, value: int) -> None:
+        shift = max(value.bit_length() - self._sub_bits - 1, 0)
+        self._counts[(shift, value >> shift)] += 1
 
-        response = requests.post(
-            "http://localhost:8080/get-user",
-            params={"id": faker.random_number(digits=2)},
-        )
-        print(response)
+        self.min = value if not self.count else min(self.min, value)
+        self.max = max(self.max, value)
+        self.count += 1
+        self.total += value
 
+    def percentile(self, p: float) -> int:
+        if not self.count:
+            return 0
 
-with ThreadPoolExecutor() as executor:
-    futures = {}
+        target = max(1, round(self.count * p / 100))
+        seen = 0
+        for (shift, bucket), count in sorted(
+            self._counts.items(), key=lambda kv: kv[0][1] << kv[0][0]
+        ):
+            seen += count
+            if seen >= target:
+                # highest value that falls into the bucket, as HdrHistogram does
+                return min(((bucket + 1) << shift) - 1, self.max)
 
-    for i in range(15):
-        futures[executor.submit(create_users)] = f"create-user-{i}"
+        return self.max
 
-    for _ in range(15):
-        futures[executor.submit(get_users)] = f"get-users-{i}"
+    def summary_ms(self) -> dict[str, float]:
+        summary = {
+            "min": self.min,
+            "mean": self.total / self.count if self.count else 0,
+            **{f"p{p:g}": self.percentile(p) for p in (50, 90, 99, 99.9)},
+            "max": self.max,
+        }
+        return {key: round(value / 1000, 3) for key, value in summary.items()}
 
-    for future in as_completed(futures):
-        print(f"completed {futures[future]}")
+
+@dataclass(slots=True)
+class EndpointStats:
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    statuses: Counter[int] = field(default_factory=Counter)
+    errors: Counter[str] = field(default_factory=Counter)
+
+    def report(self, duration: float) -> dict:
+        requests = sum(self.statuses.values()) + sum(self.errors.values())
+        return {
+            "requests": requests,
+            "rps": round(requests / duration, 1),
+            "statuses": {str(code): n for code, n in sorted(self.statuses.items())},
+            "errors": dict(self.errors),
+            "latency_ms": self.latency.summary_ms(),
+        }
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, args: argparse.Namespace) -> None:
+        self._client = client
+        self._create_ratio = args.create_ratio
+        self._stats = {CREATE_USER: EndpointStats(), GET_USER: EndpointStats()}
+        self._user_ids = list[int]()
+        self._record_from = 0.0
+
+        # faker is far too slow to call on the hot path of the client
+        faker = Faker()
+        self._payloads = [
+            {
+                "username": faker.user_name(),
+                "first_name": faker.first_name(),
+                "last_name": faker.last_name(),
+            }
+            for _ in range(1000)
+        ]
+
+    async def _request(self, scheduled_at: float) -> None:
+        if random.random() < self._create_ratio or not self._user_ids:
+            path = CREATE_USER
+            request = self._client.post(path, json=random.choice(self._payloads))
+        else:
+            path = GET_USER
+            request = self._client.post(
+                path, params={"id": random.choice(self._user_ids)}
+            )
+
+        stats = self._stats[path]
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            status = None
+            error = type(e).__name__
+        else:
+            status = response.status_code
+            if path == CREATE_USER and status == 201:
+                self._user_ids.append(response.json()["uid"])
+
+        # measured from the scheduled start rather than the actual send, so
+        # time spent queued behind a slow service is not hidden from the tail
+        latency = perf_counter() - scheduled_at
+        if scheduled_at < self._record_from:
+            return
+
+        stats.latency.record(int(latency * 1_000_000))
+        if status is None:
+            stats.errors[error] += 1
+        else:
+            stats.statuses[status] += 1
+
+    async def run_rps(self, rps: float, warmup: float, duration: float) -> None:
+        """Open loop: starts requests at a fixed rate whether or not earlier ones finished."""
+        start = perf_counter()
+        self._record_from = start + warmup
+        deadline = self._record_from + duration
+
+        interval = 1 / rps
+        tasks = set[asyncio.Task]()
+        scheduled_at = start
+        while scheduled_at < deadline:
+            delay = scheduled_at - perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            task = asyncio.create_task(self._request(scheduled_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            scheduled_at += interval
+
+        await asyncio.gather(*tasks)
+
+    async def run_concurrency(
+        self,
+        concurrency: int,
+        warmup: float,
+        duration: float,
+    ) -> None:
+        """Closed loop: each worker sends its next request once the previous one finished."""
+        start = perf_counter()
+        self._record_from = start + warmup
+        deadline = self._record_from + duration
+
+        async def worker() -> None:
+            while (now := perf_counter()) < deadline:
+                await self._request(now)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    def report(self, duration: float) -> dict:
+        endpoints = {path: s.report(duration) for path, s in self._stats.items()}
+        total = sum(endpoint["requests"] for endpoint in endpoints.values())
+        return {
+            "requests": total,
+            "rps": round(total / duration, 1),
+            "endpoints": endpoints,
+        }
+
+
+async def main(args: argparse.Namespace) -> dict:
+    limits = httpx.Limits(
+        max_connections=args.connections,
+        max_keepalive_connections=args.connections,
+    )
+    # the pool timeout is off: waiting for a free connection is part of the
+    # latency we want to see, not an error
+    timeout = httpx.Timeout(args.timeout, pool=None)
+
+    async with httpx.AsyncClient(
+        base_url=args.url, limits=limits, timeout=timeout
+    ) as client:
+        generator = LoadGenerator(client, args)
+
+        if args.rps:
+            await generator.run_rps(args.rps, args.warmup, args.duration)
+        else:
+            await generator.run_concurrency(args.concurrency, args.warmup, args.duration)
+
+    return {
+        "config": {
+            key: getattr(args, key)
+            for key in (
+                "url",
+                "rps",
+                "concurrency",
+                "connections",
+                "create_ratio",
+                "warmup",
+                "duration",
+            )
+        },
+        **generator.report(args.duration),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load generator for demo_service")
+    parser.add_argument("--url", default="http://localhost:8080")
+
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--rps", type=float, help="target request rate (open loop)")
+    mode.add_argument(
+        "--concurrency",
+        type=int,
+        help="parallel request loops (closed loop, the default with 30 loops)",
+    )
+
+    parser.add_argument("--connections", type=int, default=100, help="keep-alive pool size")
+    parser.add_argument(
+        "--create-ratio",
+        type=float,
+        default=0.5,
+        help="share of /create-user requests, the rest is /get-user",
+    )
+    parser.add_argument("--warmup", type=float, default=5, help="seconds, not recorded")
+    parser.add_argument("--duration", type=float, default=30, help="seconds recorded")
+    parser.add_argument("--timeout", type=float, default=10, help="request timeout, s")
+    parser.add_argument("--report", help="write the JSON report here instead of stdout")
+
+    args = parser.parse_args()
+    if not args.rps and not args.concurrency:
+        args.concurrency = 30
+
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main(args))
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
@@ -1,16 +1,54 @@
+import json
+import os
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Iterable
 import random
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Body, FastAPI, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
 from prometheus_fastapi_instrumentator import Instrumentator
+from pydantic import TypeAdapter, ValidationError
 
-from demo_service import store
+from demo_service import metrics, profiling, store
+from demo_service.coalescing import SingleFlight
 from demo_service.contracts import UserRequest, UserResource
 
 app = FastAPI(title="Demo User API")
 Instrumentator().instrument(app).expose(app)
 
+if os.getenv("DEMO_PROFILING") == "1":
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(profiling.router)
+
+create_user_metrics = metrics.route("/create-user")
+get_user_metrics = metrics.route("/get-user")
+get_users_metrics = metrics.route("/get-users")
+
+MAX_BATCH_SIZE = 1000
+
+_user_list_adapter = TypeAdapter(list[UserResource])
+
+
+def _encode_users(ids: Iterable[int]) -> dict[int, bytes]:
+    return {
+        id: resource.model_dump_json().encode()
+        for id, resource in store.select_many(ids).items()
+    }
+
+
+# concurrent /get-user calls for the same id share one lookup and one body
+_user_lookups = SingleFlight(_encode_users)
+
+
+def as_json(resource: UserResource, status_code: int = HTTPStatus.OK) -> Response:
+    # returning a Response keeps FastAPI from validating the resource against
+    # response_model once more, the store already built it from checked data
+    return Response(
+        resource.model_dump_json(),
+        status_code=status_code,
+        media_type="application/json",
+    )
+
 
 def maybe_raise_random_error():
     if random.random() < 0.1:
@@ -24,19 +62,82 @@ def maybe_raise_random_error():
     "/create-user",
     response_model=UserResource,
     status_code=HTTPStatus.CREATED,
+    # the body is parsed and validated in the handler so both steps can be
+    # timed separately, the schema is declared here for the docs
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": UserRequest.model_json_schema()}},
+            "required": True,
+        },
+    },
 )
-async def create_user(body: UserRequest) -> UserResource:
-    maybe_raise_random_error()
-    return store.insert(body)
+async def create_user(request: Request) -> Response:
+    with create_user_metrics.track() as timer:
+        try:
+            data = json.loads(await request.body())
+        except json.JSONDecodeError as e:
+            raise RequestValidationError(
+                [{"type": "json_invalid", "loc": ("body", e.pos), "msg": e.msg}]
+            )
+        except ValueError as e:
+            # not UTF-8 at all; FastAPI answers the same when it parses the body
+            raise HTTPException(
+                HTTPStatus.BAD_REQUEST, "There was an error parsing the body"
+            ) from e
+        timer.stage(metrics.PARSE)
+
+        try:
+            body = UserRequest.model_validate(data)
+        except ValidationError as e:
+            raise RequestValidationError(
+                [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+            )
+        timer.stage(metrics.VALIDATE)
 
+        maybe_raise_random_error()
 
-@app.post("/get-user")
-async def get_user(id: Annotated[int, Query()]) -> UserResource:
-    maybe_raise_random_error()
+        resource = store.insert(body)
+        timer.stage(metrics.STORE)
 
-    resource = store.select(id)
+        response = as_json(resource, HTTPStatus.CREATED)
+        timer.stage(metrics.SERIALIZE)
 
-    if not resource:
-        raise HTTPException(HTTPStatus.NOT_FOUND)
+        return response
+
+
+@app.post("/get-user", response_model=UserResource)
+async def get_user(id: Annotated[int, Query()]) -> Response:
+    with get_user_metrics.track() as timer:
+        maybe_raise_random_error()
+
+        # the body is encoded along with the lookup, so this stage covers both
+        content = await _user_lookups.get(id)
+        timer.stage(metrics.STORE)
+
+        if content is None:
+            raise HTTPException(HTTPStatus.NOT_FOUND)
+
+        response = Response(content, media_type="application/json")
+        timer.stage(metrics.SERIALIZE)
+
+        return response
+
+
+@app.post("/get-users", response_model=list[UserResource])
+async def get_users(
+    ids: Annotated[list[int], Body(max_length=MAX_BATCH_SIZE)],
+) -> Response:
+    """Users with the given ids in request order, unknown ids are skipped."""
+    with get_users_metrics.track() as timer:
+        maybe_raise_random_error()
+
+        users = store.select_many(ids)
+        timer.stage(metrics.STORE)
+
+        response = Response(
+            _user_list_adapter.dump_json([users[id] for id in ids if id in users]),
+            media_type="application/json",
+        )
+        timer.stage(metrics.SERIALIZE)
 
-    return resource
+        return response
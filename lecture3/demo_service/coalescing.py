@@ -0,0 +1,47 @@
+import asyncio
+from typing import Callable, Generic, Hashable, Iterable, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+
+class SingleFlight(Generic[_K, _V]):
+    """Merges lookups made during one event loop iteration into one batch.
+
+    The first `get` of an iteration schedules a flush for the next one; by
+    then every handler that was ready to run has asked for its key, so each
+    distinct key is loaded once and its value is shared by all the waiters.
+    """
+
+    def __init__(self, load_many: Callable[[Iterable[_K]], dict[_K, _V]]) -> None:
+        self._load_many = load_many
+        self._pending = dict[_K, list[asyncio.Future[_V | None]]]()
+
+    def get(self, key: _K) -> asyncio.Future[_V | None]:
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            loop.call_soon(self._flush)
+
+        # a future per waiter rather than per key: cancelling one waiter
+        # would otherwise cancel the lookup for everybody sharing it
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        return future
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+
+        try:
+            values = self._load_many(pending)
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in pending.items():
+            value = values.get(key)
+            for future in futures:
+                if not future.done():
+                    future.set_result(value)
@@ -0,0 +1,194 @@
+import os
+from bisect import bisect_left
+from itertools import accumulate
+from time import perf_counter_ns
+from typing import Iterable
+
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+from prometheus_client import REGISTRY
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+)
+
+PARSE = "parse"
+VALIDATE = "validate"
+STORE = "store"
+SERIALIZE = "serialize"
+
+# handlers run well under a millisecond, so the default prometheus buckets
+# (starting at 5ms) would put every observation into the first one
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.05,
+)
+
+
+class StageHistogram:
+    """Histogram fed with nanoseconds on the hot path.
+
+    prometheus_client histograms take a lock and convert to seconds on every
+    observation, which costs a few times more than the rest of the timer; here
+    an observation is a bisect and two integer additions (see
+    RequestTimer.stage), buckets are summed up on scrape only.
+    """
+
+    __slots__ = ("bounds_ns", "counts", "sum_ns")
+
+    def __init__(self, buckets: Iterable[float]) -> None:
+        self.bounds_ns = [int(bound * 1_000_000_000) for bound in buckets]
+        self.counts = [0] * (len(self.bounds_ns) + 1)
+        self.sum_ns = 0
+
+
+class RouteMetrics:
+    __slots__ = ("route", "stages", "in_flight", "errors")
+
+    def __init__(self, route: str, buckets: Iterable[float]) -> None:
+        self.route = route
+        self.stages = {
+            stage: StageHistogram(buckets)
+            for stage in (PARSE, VALIDATE, STORE, SERIALIZE)
+        }
+        self.in_flight = 0
+        self.errors = dict[int, int]()
+
+    def track(self) -> "RequestTimer":
+        return RequestTimer(self)
+
+
+class RequestTimer:
+    """Times the stages of one request, use as `with metrics.track() as timer`."""
+
+    __slots__ = ("_metrics", "_started")
+
+    def __init__(self, metrics: RouteMetrics) -> None:
+        self._metrics = metrics
+        self._started = 0
+
+    def __enter__(self) -> "RequestTimer":
+        self._metrics.in_flight += 1
+        self._started = perf_counter_ns()
+        return self
+
+    def stage(self, name: str) -> None:
+        """Closes the stage `name`, the next one starts from now."""
+        now = perf_counter_ns()
+        elapsed = now - self._started
+        self._started = now
+
+        histogram = self._metrics.stages[name]
+        histogram.counts[bisect_left(histogram.bounds_ns, elapsed)] += 1
+        histogram.sum_ns += elapsed
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        metrics = self._metrics
+        metrics.in_flight -= 1
+
+        if exc_type is not None:
+            if isinstance(exc, HTTPException):
+                status = exc.status_code
+            elif isinstance(exc, RequestValidationError):
+                status = 422
+            else:
+                status = 500
+
+            metrics.errors[status] = metrics.errors.get(status, 0) + 1
+
+
+class _DisabledTimer:
+    __slots__ = ()
+
+    def track(self) -> "_DisabledTimer":
+        return self
+
+    def __enter__(self) -> "_DisabledTimer":
+        return self
+
+    def stage(self, name: str) -> None:
+        pass
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+def _buckets_from_env() -> tuple[float, ...]:
+    value = os.environ.get("DEMO_STAGE_BUCKETS")
+    if not value:
+        return DEFAULT_BUCKETS
+
+    return tuple(sorted(float(bound) for bound in value.split(",")))
+
+
+_enabled = os.environ.get("DEMO_STAGE_METRICS", "1") != "0"
+_buckets = _buckets_from_env()
+_routes = dict[str, RouteMetrics]()
+
+
+def route(name: str) -> RouteMetrics | _DisabledTimer:
+    """Metrics of a route, meant to be looked up once at import time.
+
+    Counters are updated without a lock: handlers only touch them from the
+    event loop thread.
+    """
+    if not _enabled:
+        return _DisabledTimer()
+
+    if name not in _routes:
+        _routes[name] = RouteMetrics(name, _buckets)
+
+    return _routes[name]
+
+
+class _StageCollector:
+    def collect(self):
+        stages = HistogramMetricFamily(
+            "demo_service_stage_duration_seconds",
+            "Time spent in each stage of request handling",
+            labels=("route", "stage"),
+        )
+        in_flight = GaugeMetricFamily(
+            "demo_service_requests_in_flight",
+            "Requests being handled right now",
+            labels=("route",),
+        )
+        errors = CounterMetricFamily(
+            "demo_service_errors",
+            "Requests that ended with an error status",
+            labels=("route", "status"),
+        )
+
+        for metrics in list(_routes.values()):
+            for stage, histogram in metrics.stages.items():
+                counts = list(histogram.counts)
+                if not sum(counts):
+                    continue
+
+                stages.add_metric(
+                    (metrics.route, stage),
+                    list(zip([*map(str, _buckets), "+Inf"], accumulate(counts))),
+                    histogram.sum_ns / 1_000_000_000,
+                )
+
+            in_flight.add_metric((metrics.route,), metrics.in_flight)
+            for status, count in list(metrics.errors.items()):
+                errors.add_metric((metrics.route, str(status)), count)
+
+        yield stages
+        yield in_flight
+        yield errors
+
+
+if _enabled:
+    REGISTRY.register(_StageCollector())
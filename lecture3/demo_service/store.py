@@ -1,8 +1,19 @@
+from dataclasses import dataclass
+from datetime import datetime
 from typing import Iterable
 
 from demo_service.contracts import UserRequest, UserResource
 
 
+@dataclass(slots=True)
+class UserRecord:
+    uid: int
+    username: str
+    first_name: str
+    last_name: str
+    birthdate: datetime | None
+
+
 def _generate_int_id() -> Iterable[int]:
     i = 0
     while True:
@@ -10,18 +21,44 @@ def _generate_int_id() -> Iterable[int]:
         i += 1
 
 
-_users = dict[int, UserResource]()
+_users = dict[int, UserRecord]()
 _id_generator = _generate_int_id()
 
 
+def _as_resource(record: UserRecord) -> UserResource:
+    # fields of a record come from an already validated UserRequest,
+    # so the resource is built without validating them a second time
+    return UserResource.model_construct(
+        uid=record.uid,
+        username=record.username,
+        first_name=record.first_name,
+        last_name=record.last_name,
+        birthdate=record.birthdate,
+    )
+
+
 def insert(user: UserRequest) -> UserResource:
     id = next(_id_generator)
-    resource = UserResource(uid=id, **user.model_dump())
+    record = UserRecord(
+        id,
+        user.username,
+        user.first_name,
+        user.last_name,
+        user.birthdate,
+    )
 
-    _users[id] = resource
+    _users[id] = record
 
-    return resource
+    return _as_resource(record)
 
 
 def select(id: int) -> UserResource | None:
-    return _users.get(id, None)
+    record = _users.get(id, None)
+    if record is None:
+        return None
+
+    return _as_resource(record)
+
+
+def select_many(ids: Iterable[int]) -> dict[int, UserResource]:
+    return {id: _as_resource(_users[id]) for id in ids if id in _users}
@@ -0,0 +1,95 @@
+import json
+from typing import Any, Optional
+
+import asyncpg
+
+from main import UserRepository
+from ttl_cache import MISSING, TTLCache
+
+CHANNEL = "users_changed"
+
+
+class CachedUserRepository:
+    """Read-through кэш перед UserRepository по id и email.
+
+    Остальные методы репозитория вызываются напрямую. Изменения через этот
+    же объект сбрасывают кэш сразу, изменения из других процессов - по
+    LISTEN/NOTIFY (см. listen и триггер notify_users_changed в init.sql).
+    """
+
+    def __init__(self, repository: UserRepository, cache: Optional[TTLCache] = None):
+        self.repository = repository
+        self.cache = cache or TTLCache()
+        self._listener: Optional[asyncpg.Connection] = None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.repository, name)
+
+    def _remember(self, user: Optional[dict], key: tuple, epoch: int) -> None:
+        if not self.cache.set(key, user, epoch):
+            # пока шло чтение, пользователя изменили, значение уже устарело
+            return
+        if user is not None:
+            # пользователь, найденный по одному ключу, годится и для другого
+            self.cache.set(("id", user["id"]), user, epoch)
+            self.cache.set(("email", user["email"]), user, epoch)
+
+    def invalidate(self, user_id: int, *emails: str) -> None:
+        cached = self.cache.peek(("id", user_id))
+        if cached is not MISSING and cached is not None:
+            emails += (cached["email"],)
+
+        self.cache.delete(("id", user_id))
+        for email in emails:
+            self.cache.delete(("email", email))
+
+    async def get_user_by_id(self, user_id: int, connection: Optional[asyncpg.Connection] = None) -> Optional[dict]:
+        user = self.cache.get(("id", user_id))
+        if user is MISSING:
+            epoch = self.cache.epoch
+            user = await self.repository.get_user_by_id(user_id, connection)
+            self._remember(user, ("id", user_id), epoch)
+
+        return None if user is None else dict(user)
+
+    async def get_user_by_email(self, email: str, connection: Optional[asyncpg.Connection] = None) -> Optional[dict]:
+        user = self.cache.get(("email", email))
+        if user is MISSING:
+            epoch = self.cache.epoch
+            user = await self.repository.get_user_by_email(email, connection)
+            self._remember(user, ("email", email), epoch)
+
+        return None if user is None else dict(user)
+
+    async def create_user(self, email: str, name: str, age: int, connection: Optional[asyncpg.Connection] = None) -> int:
+        user_id = await self.repository.create_user(email, name, age, connection)
+        # на случай отрицательных записей, закэшированных до создания
+        self.invalidate(user_id, email)
+        return user_id
+
+    async def update_user_age(self, user_id: int, new_age: int, connection: Optional[asyncpg.Connection] = None) -> bool:
+        try:
+            return await self.repository.update_user_age(user_id, new_age, connection)
+        finally:
+            self.invalidate(user_id)
+
+    async def listen(self) -> None:
+        """Подписка на изменения пользователей из других процессов.
+
+        Для подписки нужно отдельное соединение: пул при возврате соединения
+        выполняет UNLISTEN *.
+        """
+        self._listener = await asyncpg.connect(self.repository.connection_string)
+        await self._listener.add_listener(CHANNEL, self._on_notification)
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        change = json.loads(payload)
+        self.invalidate(change["id"], *change["emails"])
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            await self._listener.close()
+            self._listener = None
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
@@ -1,61 +1,303 @@
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Tuple, Union
+
 import asyncpg
-from typing import Optional, List
+
+from pool import InstrumentedPool, PoolConfig
+from statements import StatementRegistry
+
+# агрегаты заказов берутся из user_order_stats, которую поддерживают
+# триггеры (migrations/init.sql), а не считаются по orders на каждый запрос
+_USERS_WITH_ORDERS_SELECT = """
+    SELECT u.id, u.name, u.email, s.order_count, s.total_spent
+    FROM user_order_stats s
+    JOIN users u ON u.id = s.user_id
+"""
+
+# все запросы репозитория; кэш выражений asyncpg готовит каждый при первом
+# вызове на соединении и дальше переиспользует
+QUERIES = {
+    "create_user": "INSERT INTO users (email, name, age) VALUES ($1, $2, $3) RETURNING id",
+    # RETURNING не обещает порядок строк, поэтому id сопоставляются с
+    # позицией во входных массивах по уникальному email
+    "create_users_returning_ids": """
+        WITH input AS (
+            SELECT * FROM unnest($1::varchar[], $2::varchar[], $3::int[])
+                WITH ORDINALITY AS i(email, name, age, position)
+        ), inserted AS (
+            INSERT INTO users (email, name, age)
+            SELECT email, name, age FROM input
+            RETURNING id, email
+        )
+        SELECT inserted.id
+        FROM inserted JOIN input USING (email)
+        ORDER BY input.position
+    """,
+    "get_user_by_id": "SELECT id, email, name, age, created_at FROM users WHERE id = $1",
+    "get_user_by_email": "SELECT id, email, name, age, created_at FROM users WHERE email = $1",
+    "update_user_age": "UPDATE users SET age = $1 WHERE id = $2 RETURNING id",
+    "users_with_orders": _USERS_WITH_ORDERS_SELECT + """
+        ORDER BY s.total_spent DESC, s.user_id DESC
+    """,
+    "users_with_orders_first_page": _USERS_WITH_ORDERS_SELECT + """
+        ORDER BY s.total_spent DESC, s.user_id DESC
+        LIMIT $1
+    """,
+    "users_with_orders_page": _USERS_WITH_ORDERS_SELECT + """
+        WHERE (s.total_spent, s.user_id) < ($1, $2)
+        ORDER BY s.total_spent DESC, s.user_id DESC
+        LIMIT $3
+    """,
+    # проверка товаров и вставка одним выражением: FOR SHARE не дает снять
+    # товар с продажи до конца транзакции, а если хоть одной позиции нет
+    # в наличии, не вставляется ни одна
+    "place_order": """
+        WITH items AS (
+            SELECT * FROM unnest($2::int[], $3::int[]) AS i(product_id, quantity)
+        ),
+        available AS (
+            SELECT id, price
+            FROM products
+            WHERE id IN (SELECT product_id FROM items) AND in_stock
+            FOR SHARE
+        )
+        INSERT INTO orders (user_id, product_id, quantity, total_price)
+        SELECT $1, i.product_id, i.quantity, a.price * i.quantity
+        FROM items i
+        JOIN available a ON a.id = i.product_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM items
+            WHERE product_id NOT IN (SELECT id FROM available)
+        )
+        RETURNING id, product_id, quantity, total_price
+    """,
+}
+
+# email, name, age - в порядке колонок таблицы users
+UserRecord = Tuple[str, str, int]
+# product_id, quantity
+OrderItem = Tuple[int, int]
+
+
+async def _chunks(
+    users: Union[Iterable[UserRecord], AsyncIterable[UserRecord]],
+    size: int,
+) -> AsyncIterator[List[UserRecord]]:
+    """Нарезка обычного или асинхронного потока пользователей на пачки"""
+    chunk: List[UserRecord] = []
+
+    if isinstance(users, AsyncIterable):
+        async for user in users:
+            chunk.append(user)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+    else:
+        for user in users:
+            chunk.append(user)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+
+    if chunk:
+        yield chunk
 
 
 class UserRepository:
     """Простой репозиторий для работы с пользователями через asyncpg"""
 
-    def __init__(self, connection_string: str):
+    def __init__(self, connection_string: str, pool_config: Optional[PoolConfig] = None):
         self.connection_string = connection_string
-        self.pool: Optional[asyncpg.Pool] = None
+        self.pool_config = pool_config or PoolConfig.from_env()
+        self.pool: Optional[InstrumentedPool] = None
+        self.statements = StatementRegistry(QUERIES)
 
     async def initialize(self):
         """Инициализация пула соединений"""
-        self.pool = await asyncpg.create_pool(self.connection_string, min_size=2, max_size=10)
+        self.pool = InstrumentedPool(self.connection_string, self.pool_config)
+        await self.pool.open()
 
     async def close(self):
         """Закрытие пула"""
         if self.pool:
             await self.pool.close()
 
-    async def create_user(self, email: str, name: str, age: int) -> int:
-        """Создание нового пользователя"""
+    def pool_stats(self) -> dict:
+        """Загруженность пула и гистограмма ожидания соединения"""
+        return self.pool.stats()
+
+    def statement_stats(self) -> dict:
+        """Число вызовов и время выполнения каждого запроса"""
+        return self.statements.snapshot()
+
+    @asynccontextmanager
+    async def connection(
+        self,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> AsyncIterator[asyncpg.Connection]:
+        """Соединение для нескольких вызовов подряд.
+
+        Методы репозитория принимают `connection`: если передать уже взятое
+        соединение, они не будут каждый раз заново занимать его из пула.
+        """
+        if connection is not None:
+            yield connection
+            return
+
         async with self.pool.acquire() as connection:
-            row = await connection.fetchrow(
-                "INSERT INTO users (email, name, age) VALUES ($1, $2, $3) RETURNING id",
-                email, name, age
-            )
+            yield connection
+
+    async def create_user(
+        self,
+        email: str,
+        name: str,
+        age: int,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> int:
+        """Создание нового пользователя"""
+        async with self.connection(connection) as connection:
+            row = await self.statements.fetchrow(connection, "create_user", email, name, age)
             return row['id']
 
-    async def get_user_by_id(self, user_id: int) -> Optional[dict]:
+    async def create_users_bulk(
+        self,
+        users: Union[Iterable[UserRecord], AsyncIterable[UserRecord]],
+        chunk_size: int = 10_000,
+        return_ids: bool = False,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> Union[int, List[int]]:
+        """Массовое создание пользователей пачками по chunk_size.
+
+        Без return_ids пачки пишутся через COPY - это самый быстрый путь,
+        возвращается число вставленных строк. С return_ids используется
+        INSERT ... SELECT FROM unnest(...) RETURNING id, одна команда на
+        пачку; id возвращаются в порядке входных данных.
+
+        Каждая пачка - отдельная транзакция: при ошибке уже записанные
+        пачки остаются в таблице. Поток читается лениво, в памяти держится
+        только текущая пачка.
+        """
+        inserted = 0
+        ids: List[int] = []
+
+        async with self.connection(connection) as connection:
+            async for chunk in _chunks(users, chunk_size):
+                if not return_ids:
+                    await connection.copy_records_to_table(
+                        "users", records=chunk, columns=("email", "name", "age")
+                    )
+                    inserted += len(chunk)
+                    continue
+
+                emails, names, ages = zip(*chunk)
+                rows = await self.statements.fetch(
+                    connection, "create_users_returning_ids", emails, names, ages
+                )
+                ids.extend(row['id'] for row in rows)
+
+        return ids if return_ids else inserted
+
+    async def get_user_by_id(
+        self,
+        user_id: int,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> Optional[dict]:
         """Получение пользователя по ID"""
-        async with self.pool.acquire() as connection:
-            row = await connection.fetchrow(
-                "SELECT id, email, name, age, created_at FROM users WHERE id = $1",
-                user_id
-            )
+        async with self.connection(connection) as connection:
+            row = await self.statements.fetchrow(connection, "get_user_by_id", user_id)
+            return dict(row) if row else None
+
+    async def get_user_by_email(
+        self,
+        email: str,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> Optional[dict]:
+        """Получение пользователя по email"""
+        async with self.connection(connection) as connection:
+            row = await self.statements.fetchrow(connection, "get_user_by_email", email)
             return dict(row) if row else None
 
-    async def update_user_age(self, user_id: int, new_age: int) -> bool:
+    async def update_user_age(
+        self,
+        user_id: int,
+        new_age: int,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> bool:
         """Обновление возраста пользователя"""
-        async with self.pool.acquire() as connection:
-            result = await connection.execute(
-                "UPDATE users SET age = $1 WHERE id = $2",
-                new_age, user_id
-            )
-            return result.split()[-1] == '1'
-
-    async def get_users_with_orders(self) -> List[dict]:
-        """Получение пользователей с количеством их заказов (JOIN запрос)"""
-        async with self.pool.acquire() as connection:
-            rows = await connection.fetch("""
-                SELECT
-                    u.id, u.name, u.email,
-                    COUNT(o.id) as order_count,
-                    COALESCE(SUM(o.total_price), 0) as total_spent
-                FROM users u
-                LEFT JOIN orders o ON u.id = o.user_id
-                GROUP BY u.id, u.name, u.email
-                ORDER BY total_spent DESC
-            """)
+        async with self.connection(connection) as connection:
+            row = await self.statements.fetchrow(connection, "update_user_age", new_age, user_id)
+            return row is not None
+
+    async def get_users_with_orders(
+        self,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> List[dict]:
+        """Получение пользователей с количеством их заказов.
+
+        Все строки сразу в памяти - для больших таблиц есть
+        iter_users_with_orders и get_users_with_orders_page.
+        """
+        async with self.connection(connection) as connection:
+            rows = await self.statements.fetch(connection, "users_with_orders")
+            return [dict(row) for row in rows]
+
+    async def iter_users_with_orders(
+        self,
+        prefetch: int = 1000,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> AsyncIterator[dict]:
+        """Потоковый отчет через серверный курсор, по prefetch строк за раз.
+
+        Соединение занято, пока генератор не дочитан или не закрыт.
+        """
+        async with self.connection(connection) as connection:
+            # курсоры asyncpg живут только внутри транзакции
+            async with connection.transaction(readonly=True):
+                async for row in self.statements.cursor(connection, "users_with_orders", prefetch=prefetch):
+                    yield dict(row)
+
+    async def get_users_with_orders_page(
+        self,
+        limit: int = 100,
+        after: Optional[Tuple[Decimal, int]] = None,
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> List[dict]:
+        """Страница отчета после ключа after = (total_spent, id) предыдущей.
+
+        Keyset-пагинация: страница читается по индексу с нужного места,
+        а не пропуском OFFSET строк, так что стоит одинаково на любой глубине.
+        """
+        async with self.connection(connection) as connection:
+            if after is None:
+                rows = await self.statements.fetch(connection, "users_with_orders_first_page", limit)
+            else:
+                rows = await self.statements.fetch(
+                    connection, "users_with_orders_page", after[0], after[1], limit
+                )
+            return [dict(row) for row in rows]
+
+    async def place_order(
+        self,
+        user_id: int,
+        items: Iterable[OrderItem],
+        connection: Optional[asyncpg.Connection] = None,
+    ) -> List[dict]:
+        """Заказ нескольких товаров за один запрос к базе.
+
+        Либо создаются заказы на все позиции, либо (если какого-то товара
+        нет или он не в наличии) ни одного - тогда ValueError.
+        """
+        product_ids, quantities = [], []
+        for product_id, quantity in items:
+            product_ids.append(product_id)
+            quantities.append(quantity)
+
+        if not product_ids:
+            return []
+
+        async with self.connection(connection) as connection:
+            rows = await self.statements.fetch(connection, "place_order", user_id, product_ids, quantities)
+            if not rows:
+                raise ValueError("Не все товары заказа есть в наличии")
             return [dict(row) for row in rows]
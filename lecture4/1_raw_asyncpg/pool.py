@@ -0,0 +1,136 @@
+import os
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields
+from time import perf_counter
+from typing import AsyncIterator, Optional, Tuple
+
+import asyncpg
+
+# ожидание соединения из пула обычно укладывается в микросекунды,
+# а при исчерпании пула вырастает до длительности запросов
+ACQUIRE_WAIT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Настройки пула соединений asyncpg"""
+    min_size: int = 2
+    max_size: int = 10
+    # соединение пересоздается после стольких запросов (0 - никогда)
+    max_queries: int = 50_000
+    # простаивающее дольше соединение закрывается (0 - никогда)
+    max_inactive_connection_lifetime: float = 300.0
+    # сколько подготовленных выражений кэшировать на соединение,
+    # 0 - если между пулом и Postgres стоит pgbouncer в режиме transaction
+    statement_cache_size: int = 100
+    # через сколько секунд выражение из кэша готовится заново (0 - никогда):
+    # запросы репозитория не меняются, перепланировать их по таймеру незачем
+    max_cached_statement_lifetime: int = 0
+    command_timeout: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, prefix: str = "PG_POOL_") -> "PoolConfig":
+        """Настройки из переменных окружения, например PG_POOL_MAX_SIZE=20"""
+        values = {}
+        for field in fields(cls):
+            value = os.getenv(prefix + field.name.upper())
+            if value is not None:
+                values[field.name] = float(value) if field.type in (float, Optional[float]) else int(value)
+
+        return cls(**values)
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин (в секундах)"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль q"""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+
+        return float("inf") if self.counts[-1] else 0.0
+
+
+class InstrumentedPool:
+    """Пул соединений с метриками ожидания и загруженности"""
+
+    def __init__(self, dsn: str, config: PoolConfig = PoolConfig()):
+        self.dsn = dsn
+        self.config = config
+        self.pool: Optional[asyncpg.Pool] = None
+        self.acquire_wait = Histogram(ACQUIRE_WAIT_BUCKETS)
+        self.waiting = 0
+        self.in_use = 0
+
+    async def open(self):
+        """Создание пула по настройкам"""
+        self.pool = await asyncpg.create_pool(
+            self.dsn,
+            min_size=self.config.min_size,
+            max_size=self.config.max_size,
+            max_queries=self.config.max_queries,
+            max_inactive_connection_lifetime=self.config.max_inactive_connection_lifetime,
+            statement_cache_size=self.config.statement_cache_size,
+            max_cached_statement_lifetime=self.config.max_cached_statement_lifetime,
+            command_timeout=self.config.command_timeout,
+        )
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+        """Соединение из пула, время ожидания попадает в гистограмму"""
+        started = perf_counter()
+        self.waiting += 1
+        try:
+            connection = await self.pool.acquire()
+        finally:
+            self.waiting -= 1
+            self.acquire_wait.observe(perf_counter() - started)
+
+        self.in_use += 1
+        try:
+            yield connection
+        finally:
+            self.in_use -= 1
+            await self.pool.release(connection)
+
+    def stats(self) -> dict:
+        """Снимок загруженности пула"""
+        return {
+            "size": self.pool.get_size() if self.pool else 0,
+            "idle": self.pool.get_idle_size() if self.pool else 0,
+            "in_use": self.in_use,
+            "max_size": self.config.max_size,
+            # доля занятых соединений от максимума, 1.0 - пул исчерпан
+            "saturation": self.in_use / self.config.max_size,
+            "waiting": self.waiting,
+            "acquire_wait": {
+                "count": self.acquire_wait.count,
+                "sum": self.acquire_wait.sum,
+                "p50": self.acquire_wait.quantile(0.5),
+                "p99": self.acquire_wait.quantile(0.99),
+                "buckets": dict(zip([*map(str, ACQUIRE_WAIT_BUCKETS), "+Inf"], self.acquire_wait.counts)),
+            },
+        }
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+import asyncpg
+
+
+@dataclass
+class StatementStats:
+    """Счетчики выполнения одного запроса"""
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+
+    def observe(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+
+class StatementRegistry:
+    """Реестр запросов репозитория со счетчиками времени выполнения.
+
+    Сам реестр ничего не готовит: запросы выполняются текстом через
+    connection.fetch*, а разбирает и планирует их кэш выражений asyncpg
+    (statement_cache_size в PoolConfig). Кэш живет на соединении, поэтому
+    каждый запрос готовится при первом вызове на соединении и дальше
+    переиспользуется; с max_cached_statement_lifetime=0 он не устаревает.
+    Заранее, в init пула, кэш не прогреть: connection.prepare() в него не
+    пишет, а PreparedStatement нельзя вызывать после возврата соединения
+    в пул. С statement_cache_size=0 (pgbouncer в режиме transaction)
+    запросы не кэшируются вовсе.
+    """
+
+    def __init__(self, queries: Dict[str, str]):
+        self.queries = dict(queries)
+        self.stats = {name: StatementStats() for name in self.queries}
+
+    async def fetch(self, connection: asyncpg.Connection, name: str, *args: Any) -> List[asyncpg.Record]:
+        started = perf_counter()
+        try:
+            return await connection.fetch(self.queries[name], *args)
+        finally:
+            self.stats[name].observe(perf_counter() - started)
+
+    async def fetchrow(self, connection: asyncpg.Connection, name: str, *args: Any) -> Optional[asyncpg.Record]:
+        started = perf_counter()
+        try:
+            return await connection.fetchrow(self.queries[name], *args)
+        finally:
+            self.stats[name].observe(perf_counter() - started)
+
+    def cursor(self, connection: asyncpg.Connection, name: str, *args: Any, prefetch: int):
+        """Курсор по запросу; время чтения курсора в счетчики не попадает"""
+        return connection.cursor(self.queries[name], *args, prefetch=prefetch)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "calls": stats.calls,
+                "total_time": stats.total_time,
+                "avg_time": stats.total_time / stats.calls if stats.calls else 0.0,
+                "max_time": stats.max_time,
+            }
+            for name, stats in self.stats.items()
+        }
@@ -1,10 +1,27 @@
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional
 from datetime import datetime
-from sqlmodel import SQLModel, Field, Session, select
+from decimal import Decimal
+from sqlalchemy import Integer, column, insert, update, values
+from sqlalchemy.engine import Row
+from sqlmodel import SQLModel, Field, Session, func, select
 
 
 # === ActiveRecord модели ===
 
+class Order(SQLModel, table=True):
+    __tablename__ = "orders"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id", index=True)
+    product_id: int
+    quantity: int = Field(gt=0)
+    total_price: Decimal = Field(ge=0, max_digits=10, decimal_places=2)
+    status: str = Field(default="pending", max_length=50)
+    created_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+    updated_at: Optional[datetime] = Field(default_factory=datetime.utcnow)
+
+
 class User(SQLModel, table=True):
     __tablename__ = "users"
 
@@ -26,6 +43,26 @@ class User(SQLModel, table=True):
         session.refresh(user)
         return user
 
+    @classmethod
+    def bulk_create(cls, session: Session, users: Iterable[dict], commit: bool = True) -> List["User"]:
+        """Создание пользователей из словарей с email, name и age.
+
+        Строки уходят многострочными INSERT ... RETURNING (пачками по
+        insertmanyvalues_page_size), id и значения по умолчанию приходят
+        в ответе, поэтому refresh на каждую строку не нужен. Пользователи
+        возвращаются в порядке входных данных.
+        """
+        rows = list(users)
+        if not rows:
+            return []
+
+        statement = insert(cls).returning(cls, sort_by_parameter_order=True)
+        created = list(session.scalars(statement, rows))
+        if commit:
+            _commit_detached(session, created)
+
+        return created
+
     @classmethod
     def find_by_id(cls, session: Session, user_id: int) -> Optional["User"]:
         """Поиск пользователя по ID"""
@@ -38,21 +75,50 @@ class User(SQLModel, table=True):
         return session.exec(statement).first()
 
     @classmethod
-    def get_all_with_stats(cls, session: Session) -> List[dict]:
-        """Получение всех пользователей со статистикой заказов"""
-        statement = select(cls).order_by(cls.created_at)
-        users = session.exec(statement).all()
-
-        result = []
-        for user in users:
-            result.append({
-                "id": user.id,
-                "name": user.name,
-                "email": user.email,
-                "age": user.age,
-                "order_count": 0
-            })
-        return result
+    def _stats_statement(cls, limit: Optional[int], after_id: Optional[int]):
+        # один GROUP BY по заказам вместо загрузки пользователей целиком
+        # и отдельного запроса на каждого; в выборке только нужные колонки,
+        # так что ORM-объекты и identity map не создаются
+        statement = (
+            select(
+                cls.id,
+                cls.name,
+                cls.email,
+                cls.age,
+                func.count(Order.id).label("order_count"),
+                func.coalesce(func.sum(Order.total_price), 0).label("total_spent"),
+            )
+            .outerjoin(Order, Order.user_id == cls.id)
+            .group_by(cls.id)
+            .order_by(cls.id)
+        )
+        if after_id is not None:
+            statement = statement.where(cls.id > after_id)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
+
+    @classmethod
+    def get_all_with_stats(
+        cls,
+        session: Session,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+    ) -> List[Row]:
+        """Пользователи со статистикой заказов, по возрастанию id.
+
+        Строки - кортежи (id, name, email, age, order_count, total_spent)
+        с доступом по именам. Для постраничного чтения передавайте limit и
+        id последней строки предыдущей страницы в after_id.
+        """
+        return session.exec(cls._stats_statement(limit, after_id)).all()
+
+    @classmethod
+    def iter_all_with_stats(cls, session: Session, batch_size: int = 1000) -> Iterator[Row]:
+        """То же, что get_all_with_stats, но потоком через серверный курсор:
+        в памяти держится не больше batch_size строк"""
+        statement = cls._stats_statement(None, None).execution_options(yield_per=batch_size)
+        yield from session.exec(statement)
 
     def update_age(self, session: Session, new_age: int) -> "User":
         """Обновление возраста пользователя"""
@@ -63,6 +129,43 @@ class User(SQLModel, table=True):
         session.refresh(self)
         return self
 
+    @classmethod
+    def bulk_update_age(cls, session: Session, ages: Mapping[int, int], commit: bool = True) -> List["User"]:
+        """Обновление возраста по словарю {id: возраст} одним
+        UPDATE ... FROM (VALUES ...) RETURNING; несуществующие id пропускаются"""
+        if not ages:
+            return []
+
+        new_ages = values(column("id", Integer), column("age", Integer), name="new_ages").data(list(ages.items()))
+        statement = (
+            update(cls)
+            .where(cls.id == new_ages.c.id)
+            .values(age=new_ages.c.age, updated_at=func.now())
+            .returning(cls)
+            # строки из RETURNING перезаписывают уже загруженные в сессию объекты
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        updated = list(session.scalars(statement))
+        if commit:
+            _commit_detached(session, updated)
+
+        return updated
+
+    @classmethod
+    @contextmanager
+    def batch(cls, session: Session) -> Iterator["UserBatch"]:
+        """Unit of work: изменения копятся в UserBatch и при выходе из блока
+        записываются bulk_create и bulk_update_age с одним commit"""
+        batch = UserBatch(session)
+        try:
+            yield batch
+            batch.flush()
+        except Exception:
+            session.rollback()
+            raise
+
+        _commit_detached(session, batch.created + batch.updated)
+
     def to_dict(self) -> dict:
         """Преобразование в словарь для вывода"""
         return {
@@ -72,3 +175,36 @@ class User(SQLModel, table=True):
             "age": self.age,
             "created_at": self.created_at
         }
+
+
+class UserBatch:
+    """Отложенные изменения пользователей, см. User.batch"""
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.created: List[User] = []
+        self.updated: List[User] = []
+        self._creates: List[dict] = []
+        self._ages: Dict[int, int] = {}
+
+    def create(self, email: str, name: str, age: int) -> None:
+        self._creates.append({"email": email, "name": name, "age": age})
+
+    def update_age(self, user_id: int, new_age: int) -> None:
+        # повторное изменение того же пользователя заменяет предыдущее
+        self._ages[user_id] = new_age
+
+    def flush(self) -> None:
+        """Запись накопленного без commit, результаты в created и updated"""
+        self.created += User.bulk_create(self.session, self._creates, commit=False)
+        self.updated += User.bulk_update_age(self.session, self._ages, commit=False)
+        self._creates, self._ages = [], {}
+
+
+def _commit_detached(session: Session, users: List[User]) -> None:
+    # commit помечает объекты сессии устаревшими, и первое же обращение к
+    # атрибуту стоило бы SELECT на каждого; отсоединенные объекты сохраняют
+    # данные из RETURNING, а session.add снова привязывает их к сессии
+    for user in users:
+        session.expunge(user)
+    session.commit()
@@ -0,0 +1,108 @@
+import json
+import select
+import threading
+from dataclasses import replace
+from typing import List, Optional
+
+import psycopg2
+import psycopg2.extensions
+
+from main import User, UserRepositoryInterface
+from ttl_cache import MISSING, TTLCache
+
+CHANNEL = "users_changed"
+
+
+class CachedUserRepository(UserRepositoryInterface):
+    """Read-through кэш перед любым UserRepositoryInterface по id и email.
+
+    Изменения через этот же объект сбрасывают кэш сразу, изменения из других
+    процессов - по LISTEN/NOTIFY (см. listen и триггер notify_users_changed
+    в init.sql).
+    """
+
+    def __init__(self, repository: UserRepositoryInterface, cache: Optional[TTLCache] = None):
+        self.repository = repository
+        self.cache = cache or TTLCache()
+        self._listening = threading.Event()
+
+    def _remember(self, user: Optional[User], key: tuple, epoch: int) -> None:
+        if not self.cache.set(key, user, epoch):
+            # пока шло чтение, пользователя изменили, значение уже устарело
+            return
+        if user is not None:
+            # пользователь, найденный по одному ключу, годится и для другого
+            self.cache.set(("id", user.id), user, epoch)
+            self.cache.set(("email", user.email), user, epoch)
+
+    def invalidate(self, user_id: Optional[int], *emails: str) -> None:
+        cached = self.cache.peek(("id", user_id))
+        if cached is not MISSING and cached is not None:
+            emails += (cached.email,)
+
+        self.cache.delete(("id", user_id))
+        for email in emails:
+            self.cache.delete(("email", email))
+
+    def create(self, user: User) -> User:
+        created = self.repository.create(user)
+        # на случай отрицательных записей, закэшированных до создания
+        self.invalidate(created.id, created.email)
+        return created
+
+    def find_by_id(self, user_id: int) -> Optional[User]:
+        user = self.cache.get(("id", user_id))
+        if user is MISSING:
+            epoch = self.cache.epoch
+            user = self.repository.find_by_id(user_id)
+            self._remember(user, ("id", user_id), epoch)
+
+        # доменные модели изменяемые, наружу отдается копия
+        return None if user is None else replace(user)
+
+    def find_by_email(self, email: str) -> Optional[User]:
+        user = self.cache.get(("email", email))
+        if user is MISSING:
+            epoch = self.cache.epoch
+            user = self.repository.find_by_email(email)
+            self._remember(user, ("email", email), epoch)
+
+        return None if user is None else replace(user)
+
+    def get_all(self) -> List[User]:
+        return self.repository.get_all()
+
+    def update(self, user: User) -> User:
+        try:
+            return self.repository.update(user)
+        finally:
+            self.invalidate(user.id, user.email)
+
+    def listen(self, dsn: str) -> None:
+        """Фоновый поток, сбрасывающий кэш по уведомлениям users_changed"""
+        connection = psycopg2.connect(dsn)
+        connection.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+        def run():
+            try:
+                while self._listening.is_set():
+                    if select.select([connection], [], [], 1.0) == ([], [], []):
+                        continue
+
+                    connection.poll()
+                    while connection.notifies:
+                        change = json.loads(connection.notifies.pop(0).payload)
+                        self.invalidate(change["id"], *change["emails"])
+            finally:
+                connection.close()
+
+        self._listening.set()
+        threading.Thread(target=run, name="users-cache-listener", daemon=True).start()
+
+    def close(self) -> None:
+        self._listening.clear()
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
@@ -1,8 +1,11 @@
-from typing import List, Optional
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Set, TypeVar
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
@@ -92,6 +95,30 @@ class UserRepositoryInterface(ABC):
         pass
 
 
+class AsyncUserRepositoryInterface(ABC):
+    """Асинхронный интерфейс репозитория пользователей"""
+
+    @abstractmethod
+    async def create(self, user: User) -> User:
+        pass
+
+    @abstractmethod
+    async def find_by_id(self, user_id: int) -> Optional[User]:
+        pass
+
+    @abstractmethod
+    async def find_by_ids(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        pass
+
+    @abstractmethod
+    async def find_by_email(self, email: str) -> Optional[User]:
+        pass
+
+    @abstractmethod
+    async def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        pass
+
+
 # === Конкретные реализации репозиториев ===
 
 class SqlAlchemyUserRepository(UserRepositoryInterface):
@@ -128,6 +155,105 @@ class SqlAlchemyUserRepository(UserRepositoryInterface):
         return UserMapper.to_domain(orm_user)
 
 
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class BatchLoader(Generic[K, V]):
+    """Склеивает одиночные запросы по ключу в один пакетный (как DataLoader).
+
+    Все load, вызванные до того, как event loop дойдет до запланированной
+    загрузки, уходят одним вызовом load_many - например, одним IN (...)
+    вместо N отдельных SELECT от параллельных корутин.
+    """
+
+    def __init__(self, load_many: Callable[[List[K]], Awaitable[Dict[K, V]]]):
+        self.load_many = load_many
+        self._pending: Dict[K, List[asyncio.Future]] = {}
+        # event loop держит задачи только по слабым ссылкам, без этого
+        # загрузку мог бы собрать сборщик мусора вместе с ожидающими
+        self._dispatches: Set[asyncio.Task] = set()
+
+    def load(self, key: K) -> "asyncio.Future[Optional[V]]":
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            task = loop.create_task(self._dispatch())
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        return future
+
+    async def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+
+        try:
+            values = await self.load_many(list(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(values.get(key))
+
+
+class AsyncSqlAlchemyUserRepository(AsyncUserRepositoryInterface):
+    """Асинхронная SQLAlchemy реализация репозитория пользователей.
+
+    Одиночные find_by_id/find_by_email идут через BatchLoader, так что
+    параллельные поиски превращаются в один запрос. AsyncSession не
+    допускает параллельных запросов, поэтому обращения к ней идут по очереди.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self._lock = asyncio.Lock()
+        self._by_id = BatchLoader(self.find_by_ids)
+        self._by_email = BatchLoader(self.find_by_emails)
+
+    async def create(self, user: User) -> User:
+        """Создание одним INSERT ... ON CONFLICT DO NOTHING без проверки заранее"""
+        statement = (
+            insert(UserOrm)
+            .values(email=user.email, name=user.name, age=user.age)
+            .on_conflict_do_nothing(index_elements=[UserOrm.email])
+            .returning(UserOrm.id, UserOrm.email, UserOrm.name, UserOrm.age)
+        )
+        async with self._lock:
+            row = (await self.session.execute(statement)).one_or_none()
+
+        if row is None:
+            raise ValueError(f"User with email {user.email} already exists")
+
+        return User(id=row.id, email=row.email, name=row.name, age=row.age)
+
+    async def find_by_id(self, user_id: int) -> Optional[User]:
+        return await self._by_id.load(user_id)
+
+    async def find_by_ids(self, user_ids: Iterable[int]) -> Dict[int, User]:
+        async with self._lock:
+            orm_users = await self.session.scalars(
+                select(UserOrm).where(UserOrm.id.in_(list(user_ids)))
+            )
+            return {orm_user.id: UserMapper.to_domain(orm_user) for orm_user in orm_users}
+
+    async def find_by_email(self, email: str) -> Optional[User]:
+        return await self._by_email.load(email)
+
+    async def find_by_emails(self, emails: Iterable[str]) -> Dict[str, User]:
+        async with self._lock:
+            orm_users = await self.session.scalars(
+                select(UserOrm).where(UserOrm.email.in_(list(emails)))
+            )
+            return {orm_user.email: UserMapper.to_domain(orm_user) for orm_user in orm_users}
+
+
 # === Сервисы для бизнес-логики ===
 
 class UserService:
@@ -154,3 +280,28 @@ class UserService:
         if not user:
             raise ValueError(f"User with id {user_id} not found")
         return user
+
+
+class AsyncUserService:
+    """Асинхронный сервис для работы с пользователями"""
+
+    def __init__(self, user_repo: AsyncUserRepositoryInterface):
+        self.user_repo = user_repo
+
+    async def create_user(self, email: str, name: str, age: int) -> User:
+        """Создание нового пользователя с валидацией.
+
+        Занятый email проверяет сам репозиторий при вставке, отдельного
+        поиска по email перед ней нет.
+        """
+        if age < 0:
+            raise ValueError("Age cannot be negative")
+
+        return await self.user_repo.create(User(email=email, name=name, age=age))
+
+    async def get_user_with_validation(self, user_id: int) -> User:
+        """Получение пользователя с проверкой существования"""
+        user = await self.user_repo.find_by_id(user_id)
+        if not user:
+            raise ValueError(f"User with id {user_id} not found")
+        return user
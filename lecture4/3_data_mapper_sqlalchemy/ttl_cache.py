@@ -0,0 +1,87 @@
+# копия 1_raw_asyncpg/ttl_cache.py, держите их одинаковыми: примеры
+# запускаются каждый из своего каталога и импортировать друг друга не могут
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, Optional
+
+MISSING = object()
+
+
+class TTLCache:
+    """Потокобезопасный LRU-кэш с временем жизни записей.
+
+    None тоже кэшируется (отрицательный кэш), но живет negative_ttl - обычно
+    меньше ttl, потому что о новых пользователях уведомлений не приходит.
+
+    Заполнение из базы может разминуться со сбросом: чтение началось до
+    изменения строки, а закончилось после того, как кэш по этому изменению
+    сбросили. Чтобы старая строка не прожила в кэше весь ttl, перед чтением
+    берется epoch и передается в set - если с тех пор что-то сбрасывали,
+    значение не запоминается. Счетчик один на весь кэш: под частыми
+    изменениями часть заполнений пропадет зря, зато памяти под счетчики
+    отдельных ключей не нужно.
+    """
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 60.0, negative_ttl: float = 5.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        # сбрасывать кэш может поток, слушающий уведомления
+        self._lock = threading.Lock()
+        # число сбросов, см. set
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Значение по ключу или MISSING"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < monotonic():
+                self.misses += 1
+                return MISSING
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def peek(self, key: Hashable) -> Any:
+        """Как get, но без учета в статистике и порядке вытеснения"""
+        with self._lock:
+            entry = self._data.get(key)
+            return MISSING if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any, epoch: Optional[int] = None) -> bool:
+        """Запоминает значение, если с момента чтения epoch ничего не сбрасывали"""
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return False
+
+            self._data[key] = (monotonic() + ttl, value)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+            return True
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self.epoch += 1
+            self._data.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._data),
+            }
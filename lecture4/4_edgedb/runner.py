@@ -0,0 +1,199 @@
+"""Запуск запросов из queries/*.edgeql через пул соединений EdgeDB"""
+import asyncio
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from uuid import UUID
+
+import edgedb
+from edgedb.enums import Cardinality
+
+QUERIES_DIR = Path(__file__).parent / "queries"
+
+# <optional str>$description, <array<uuid>>$product_ids; у <decimal><int32>$quantity
+# берется ближайшее приведение
+_PARAM_RE = re.compile(r"<(optional\s+)?(\w+(?:<\w+>)?)>\$(\w+)")
+_PARAM_TYPES = {
+    "str": str,
+    "bool": bool,
+    "int16": int,
+    "int32": int,
+    "int64": int,
+    "decimal": Decimal,
+    "uuid": UUID,
+    "datetime": datetime,
+}
+
+
+@dataclass(frozen=True)
+class Param:
+    name: str
+    edgeql_type: str
+    optional: bool
+
+
+@dataclass
+class CompiledQuery:
+    """Запрос из файла с разобранными параметрами.
+
+    Аргументы проверяются до отправки на сервер, а метод выполнения
+    (query или query_single) выбирается по кардинальности результата,
+    которую сервер сообщает при компиляции в QueryRunner.initialize.
+    """
+    name: str
+    text: str
+    params: Dict[str, Param] = field(default_factory=dict)
+    single: bool = False
+
+    @classmethod
+    def from_file(cls, path: Path) -> "CompiledQuery":
+        text = path.read_text().strip()
+        params = {}
+        for optional, edgeql_type, name in _PARAM_RE.findall(text):
+            params.setdefault(name, Param(name, edgeql_type, bool(optional)))
+
+        return cls(name=path.stem, text=text, params=params)
+
+    def bind(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Аргументы запроса, необязательные дополняются None"""
+        unknown = params.keys() - self.params.keys()
+        if unknown:
+            raise TypeError(f"{self.name}: неизвестные аргументы {sorted(unknown)}")
+
+        bound = {}
+        for param in self.params.values():
+            value = params.get(param.name)
+            if value is None:
+                if not param.optional:
+                    raise TypeError(f"{self.name}: не передан аргумент {param.name}")
+            elif not isinstance(value, _python_type(param.edgeql_type)):
+                raise TypeError(
+                    f"{self.name}: {param.name} должен быть {param.edgeql_type}, "
+                    f"а не {type(value).__name__}"
+                )
+            bound[param.name] = value
+
+        return bound
+
+    async def __call__(self, executor: edgedb.AsyncIOExecutor, **params) -> Any:
+        method = executor.query_single if self.single else executor.query
+        return await method(self.text, **self.bind(params))
+
+
+def _python_type(edgeql_type: str) -> Union[type, Tuple[type, ...]]:
+    if edgeql_type.startswith("array<"):
+        return (list, tuple)
+    return _PARAM_TYPES.get(edgeql_type, object)
+
+
+def load_queries(directory: Path = QUERIES_DIR) -> Dict[str, CompiledQuery]:
+    return {
+        path.stem: CompiledQuery.from_file(path)
+        for path in sorted(directory.glob("*.edgeql"))
+    }
+
+
+class QueryRunner:
+    """Запросы из queries/*.edgeql как асинхронные функции.
+
+    runner.create_user(email=..., name=..., age=...) выполняет запрос на
+    соединении из пула клиента; внутри транзакции те же запросы вызываются
+    через runner.queries[name](tx, ...).
+
+    Статических типов у этих функций нет: аргументы проверяются только при
+    вызове, результат - Any. Кому нужны типы, генерирует код через edgedb-py.
+
+    Кардинальность результата берется из приватного client._describe_query
+    (публичного describe у клиента нет, edgedb-py пользуется тем же
+    протоколом). Поэтому версия edgedb закреплена в requirements.txt, и при
+    ее обновлении runner нужно проверить.
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        queries_dir: Path = QUERIES_DIR,
+    ):
+        # без dsn клиент берет EDGEDB_DSN или инстанс проекта из edgedb.toml
+        self.dsn = dsn
+        self.concurrency = concurrency
+        self.queries = load_queries(queries_dir)
+        self.client: Optional[edgedb.AsyncIOClient] = None
+
+    async def initialize(self):
+        """Пул соединений и компиляция всех запросов.
+
+        Ошибки в запросах и расхождения со схемой всплывают при старте, а не
+        на первом вызове; сервер к тому же кэширует скомпилированные запросы.
+        """
+        self.client = edgedb.create_async_client(self.dsn, concurrency=self.concurrency)
+        await self.client.ensure_connected()
+
+        # приватный API, см. docstring класса
+        described = await asyncio.gather(
+            *(self.client._describe_query(query.text) for query in self.queries.values())
+        )
+        for query, description in zip(self.queries.values(), described):
+            query.single = description.output_cardinality in (
+                Cardinality.AT_MOST_ONE,
+                Cardinality.ONE,
+            )
+
+    async def close(self):
+        if self.client:
+            await self.client.aclose()
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        queries = self.__dict__.get("queries", {})
+        if name not in queries:
+            raise AttributeError(name)
+
+        return partial(queries[name], self.client)
+
+    async def create_orders(self, items: Iterable[Tuple[UUID, UUID, int]]) -> List[Any]:
+        """Заказы (user_id, product_id, quantity) одной транзакцией.
+
+        Каждый товар проверяется один раз на всю пачку; если какого-то нет
+        или он закончился, не создается ни один заказ.
+        """
+        items = list(items)
+        check_product = self.queries["check_product_for_order"]
+        create_order = self.queries["create_order"]
+
+        async for tx in self.client.transaction():
+            async with tx:
+                for product_id in dict.fromkeys(product_id for _, product_id, _ in items):
+                    product = await check_product(tx, product_id=product_id)
+                    if product is None or not product.in_stock:
+                        raise ValueError(f"Товар {product_id} недоступен для заказа")
+
+                orders = [
+                    await create_order(tx, user_id=user_id, product_id=product_id, quantity=quantity)
+                    for user_id, product_id, quantity in items
+                ]
+
+        return orders
+
+    async def place_order(self, user_id: UUID, items: Iterable[Tuple[UUID, int]]) -> List[Any]:
+        """Заказ нескольких товаров (product_id, quantity) одним запросом.
+
+        В отличие от create_orders здесь не нужен ни отдельный запрос на
+        проверку товара, ни явная транзакция: проверка и вставка - один
+        оператор EdgeQL, и при недоступном товаре он целиком откатывается
+        с edgedb.CardinalityViolationError.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        return await self.queries["place_order"](
+            self.client,
+            user_id=user_id,
+            product_ids=[product_id for product_id, _ in items],
+            quantities=[quantity for _, quantity in items],
+        )
@@ -1,4 +1,5 @@
 -- Создание схемы базы данных для примеров
+DROP TABLE IF EXISTS user_order_stats CASCADE;
 DROP TABLE IF EXISTS orders CASCADE;
 DROP TABLE IF EXISTS products CASCADE;
 DROP TABLE IF EXISTS users CASCADE;
@@ -36,11 +37,21 @@ CREATE TABLE orders (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Агрегаты заказов по пользователю, поддерживаются триггерами ниже,
+-- чтобы отчет по пользователям не пересчитывал всю таблицу orders
+CREATE TABLE user_order_stats (
+    user_id INTEGER PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    order_count INTEGER NOT NULL DEFAULT 0,
+    total_spent DECIMAL(12, 2) NOT NULL DEFAULT 0
+);
+
 -- Индексы для оптимизации запросов
 CREATE INDEX idx_users_email ON users(email);
 CREATE INDEX idx_orders_user_id ON orders(user_id);
 CREATE INDEX idx_orders_product_id ON orders(product_id);
 CREATE INDEX idx_orders_status ON orders(status);
+-- keyset-пагинация отчета по (total_spent, user_id) в обе стороны
+CREATE INDEX idx_user_order_stats_total_spent ON user_order_stats(total_spent, user_id);
 
 -- Триггер для автоматического обновления updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -60,6 +71,84 @@ CREATE TRIGGER update_products_updated_at BEFORE UPDATE ON products
 CREATE TRIGGER update_orders_updated_at BEFORE UPDATE ON orders
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Уведомление об изменении пользователя для сброса кэшей в других процессах
+-- (LISTEN users_changed). На INSERT не шлется, чтобы COPY на миллионы строк
+-- не рассылал миллионы уведомлений, отрицательный кэш живет недолго
+CREATE OR REPLACE FUNCTION notify_users_changed()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('users_changed', json_build_object(
+        'id', OLD.id,
+        'emails', CASE WHEN TG_OP = 'UPDATE'
+            THEN json_build_array(OLD.email, NEW.email)
+            ELSE json_build_array(OLD.email)
+        END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notify_users_changed AFTER UPDATE OR DELETE ON users
+    FOR EACH ROW EXECUTE FUNCTION notify_users_changed();
+
+-- Триггеры для user_order_stats: уровня выражения с таблицами переходов,
+-- так что COPY или вставка пачкой обновляют агрегаты одним запросом
+CREATE OR REPLACE FUNCTION create_user_order_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO user_order_stats (user_id) SELECT id FROM new_users;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER create_users_order_stats AFTER INSERT ON users
+    REFERENCING NEW TABLE AS new_users
+    FOR EACH STATEMENT EXECUTE FUNCTION create_user_order_stats();
+
+CREATE OR REPLACE FUNCTION update_user_order_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- old_orders есть только у UPDATE и DELETE, new_orders - у INSERT и UPDATE
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE user_order_stats s
+        SET order_count = s.order_count - d.order_count,
+            total_spent = s.total_spent - d.total_spent
+        FROM (
+            SELECT user_id, COUNT(*) AS order_count, SUM(total_price) AS total_spent
+            FROM old_orders
+            GROUP BY user_id
+        ) d
+        WHERE s.user_id = d.user_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE user_order_stats s
+        SET order_count = s.order_count + d.order_count,
+            total_spent = s.total_spent + d.total_spent
+        FROM (
+            SELECT user_id, COUNT(*) AS order_count, SUM(total_price) AS total_spent
+            FROM new_orders
+            GROUP BY user_id
+        ) d
+        WHERE s.user_id = d.user_id;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER insert_orders_user_stats AFTER INSERT ON orders
+    REFERENCING NEW TABLE AS new_orders
+    FOR EACH STATEMENT EXECUTE FUNCTION update_user_order_stats();
+
+CREATE TRIGGER update_orders_user_stats AFTER UPDATE ON orders
+    REFERENCING OLD TABLE AS old_orders NEW TABLE AS new_orders
+    FOR EACH STATEMENT EXECUTE FUNCTION update_user_order_stats();
+
+CREATE TRIGGER delete_orders_user_stats AFTER DELETE ON orders
+    REFERENCING OLD TABLE AS old_orders
+    FOR EACH STATEMENT EXECUTE FUNCTION update_user_order_stats();
+
 -- Вставка тестовых данных
 INSERT INTO users (email, name, age) VALUES
     ('alice@example.com', 'Alice Johnson', 28),